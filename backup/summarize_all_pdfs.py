@@ -1,10 +1,15 @@
 import os
-import pdfplumber
+import sys
 from openai import OpenAI
-from textwrap import wrap
 from dotenv import load_dotenv
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from extract import extract_many
+from summary_cache import SummaryCache
+from summarizer import Summarizer, SUMMARY_MODEL
+from chunking import iter_chunks, token_counter
+
 # 경로 설정
 PDF_DIR = "/Users/jeong/AI/learnmate/data/papers"
 SUMMARY_DIR = "/Users/jeong/AI/learnmate/data/abstracts"
@@ -12,58 +17,24 @@ SUMMARY_DIR = "/Users/jeong/AI/learnmate/data/abstracts"
 # OpenAI API 키 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-# 텍스트 추출
-def extract_text_from_pdf(pdf_path):
-    try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages):
-                text += page.extract_text() or ""
-        return text.strip()
-    except Exception as e:
-        print(f"❌ PDF 로딩 오류 ({pdf_path}): {e}")
-        return ""
-
-# 텍스트를 문자수 기준으로 쪼개기
-def chunk_text(text, max_chars=4000):
-    return wrap(text, width=max_chars)
-
-# 단일 chunk 요약
-def summarize_single_chunk(chunk):
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=[
-                {"role": "system", "content": "너는 교육 관련 논문을 요약하는 한국어 전문가야. 핵심을 조리 있게 요약해줘."},
-                {"role": "user", "content": f"다음 내용을 2000단어 이내로 요약해줘:\n{chunk}"}
-            ],
-            max_tokens=800,
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"❌ 요약 실패: {e}")
-        return ""
-
-# 전체 문서 요약
+CHUNK_PROMPT = "다음 내용을 2000단어 이내로 요약해줘:\n{text}"
+summarizer = Summarizer(
+    client,
+    system_prompt="너는 교육 관련 논문을 요약하는 한국어 전문가야. 핵심을 조리 있게 요약해줘.",
+    map_prompt=CHUNK_PROMPT,
+    reduce_prompt=CHUNK_PROMPT,
+    cache=SummaryCache(),
+    max_tokens=800,
+    temperature=0.3,
+)
+
+# 텍스트를 토큰 수 기준으로 쪼개기 (문단/문장 경계 유지)
+def chunk_text(text, max_tokens=1500):
+    return iter_chunks(text, max_tokens, token_counter(SUMMARY_MODEL))
+
+# 전체 문서 요약: 1차 chunk 요약은 병렬, 2차 최종 요약은 필요하면 여러 단계로
 def summarize_text(text):
-    chunks = chunk_text(text)
-    partial_summaries = []
-
-    # 1차 chunk 요약
-    for idx, chunk in enumerate(chunks):
-        print(f"✂️ Chunk {idx+1}/{len(chunks)} 요약 중...")
-        partial_summary = summarize_single_chunk(chunk)
-        if partial_summary:
-            partial_summaries.append(partial_summary)
-
-    combined_summary = "\n".join(partial_summaries)
-
-    # 2차 최종 요약
-    print("\n🌀 2차 최종 요약 중...")
-    final_summary = summarize_single_chunk(combined_summary)
-    return final_summary
+    return summarizer.summarize(chunk_text(text))
 
 # 요약 저장
 def save_summary_to_md(title, summary):
@@ -77,18 +48,20 @@ def save_summary_to_md(title, summary):
 def run_pipeline():
     os.makedirs(SUMMARY_DIR, exist_ok=True)
 
-    for filename in os.listdir(PDF_DIR):
-        if not filename.endswith(".pdf"):
-            continue
+    pdfs = [(f, os.path.join(PDF_DIR, f)) for f in os.listdir(PDF_DIR) if f.endswith(".pdf")]
 
-        pdf_path = os.path.join(PDF_DIR, filename)
+    # 추출은 프로세스 풀에서 진행, 끝나는 문서부터 바로 요약
+    for filename, pdf_path, text in extract_many(pdfs):
         print(f"\n📄 논문 처리 시작: {filename} ({datetime.now().strftime('%H:%M:%S')})")
 
-        text = extract_text_from_pdf(pdf_path)
         if not text:
             continue
 
-        summary = summarize_text(text)
+        try:
+            summary = summarize_text(text)
+        except Exception as e:
+            print(f"❌ 요약 실패 ({filename}): {e}")  # PDF는 남겨 두고 다음 실행에서 다시 시도
+            continue
         if not summary:
             continue
 
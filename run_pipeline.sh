@@ -4,5 +4,5 @@
 source /opt/anaconda3/etc/profile.d/conda.sh
 conda activate learnmate
 
-# pipeline.py 실행
-python /Users/jeong/AI/learnmate/scripts/pipeline.py
\ No newline at end of file
+# 수집 파이프라인 실행 (learnmate ingest)
+python /Users/jeong/AI/learnmate/scripts/learnmate.py ingest
\ No newline at end of file
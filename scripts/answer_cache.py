@@ -0,0 +1,90 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))  # 질문 임베딩 코사인 유사도 기준
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))  # 초
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# 비슷한 질문이 이미 답변된 적 있으면 저장된 답변을 돌려주는 semantic cache
+#   - 인덱스 버전이 바뀌면 전부 무효화
+#   - TTL 만료 + 개수 초과 시 가장 오래 안 쓴 항목부터 제거(LRU)
+class SemanticAnswerCache:
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._matrix = None  # 질문 벡터 행렬 (항목이 바뀌면 다시 만듦)
+        self._keys = []
+        self._lock = threading.Lock()
+
+    def _sync_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self._matrix = None
+            self.version = version
+
+    def _expire(self):
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if now - entry["created"] > self.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def lookup(self, vector, version):
+        with self._lock:
+            self._sync_version(version)
+            self._expire()
+            if self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[k]["vector"] for k in self._keys])
+                sims = self._matrix @ _normalize(vector)
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    key = self._keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(self._entries[key], similarity=float(sims[best]))
+            self.misses += 1
+            return None
+
+    def store(self, question, vector, answer, sources, version):
+        with self._lock:
+            self._sync_version(version)
+            self._entries[self._next_key] = {
+                "question": question,
+                "vector": _normalize(vector),
+                "answer": answer,
+                "sources": sources,
+                "created": time.time(),
+            }
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+        }
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import argparse
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+from testset import load_testset, TESTSET_PATH
+from rag import RequestTimer, retrieve, stream_answer
+from reranker import load_reranker
+
+# 검색 벤치마크: cold(모델·인덱스 로드 + 첫 질의) / warm 지연시간 분위수 / 동시 클라이언트 N명의 QPS
+#   python scripts/bench.py --testset scripts/testset.jsonl --concurrency 1 4 8
+#   python scripts/bench.py --e2e --stub-llm   # LLM 포함 end-to-end (stub이면 API 호출 없음)
+# 결과는 logs/bench-<시각>.json 으로 저장 → 인덱스 종류·모델 변경 전후 비교
+
+BENCH_DIR = os.getenv("BENCH_DIR", "logs")
+
+
+def percentiles(samples):
+    if not samples:
+        return {"n": 0}
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+# 챗봇과 같은 경로: 질의 임베딩 → (hybrid) 검색 → (선택) rerank
+def timed_retrieval(db, embedding, query, k, reranker):
+    start = time.perf_counter()
+    vector = embedding.embed_query(query)
+    retrieve(db, query, k, vector=vector, reranker=reranker)
+    return time.perf_counter() - start
+
+def run_cold(embedding_factory, vector_dir, query, k, reranker):
+    from vector_index import load_index  # faiss import도 cold 시간에 포함
+
+    start = time.perf_counter()
+    embedding = embedding_factory()
+    model_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db = load_index(vector_dir, embedding)
+    index_s = time.perf_counter() - start
+
+    first_s = timed_retrieval(db, embedding, query, k, reranker)
+    return embedding, db, {"model_load_s": model_s, "index_load_s": index_s, "first_query_s": first_s}
+
+def run_warm(db, embedding, queries, k, reranker, rounds, warmup):
+    for query in queries[:warmup]:
+        timed_retrieval(db, embedding, query, k, reranker)
+    samples = [timed_retrieval(db, embedding, q, k, reranker) for _ in range(rounds) for q in queries]
+    return percentiles(samples)
+
+# 클라이언트 N명이 각자 질의 목록을 rounds번 반복 → 전체 처리량(QPS)과 지연시간 분포
+def run_concurrent(db, embedding, queries, k, reranker, clients, rounds):
+    def client(offset):
+        order = queries[offset % len(queries):] + queries[:offset % len(queries)]
+        return [timed_retrieval(db, embedding, q, k, reranker) for _ in range(rounds) for q in order]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        samples = [s for result in pool.map(client, range(clients)) for s in result]
+    wall = time.perf_counter() - start
+    return dict(percentiles(samples), clients=clients, qps=len(samples) / wall)
+
+def run_e2e(db, embedding, llm, queries, k, reranker):
+    ttft, total = [], []
+    for query in queries:
+        timer = RequestTimer()
+        docs = retrieve(db, query, k, vector=embedding.embed_query(query), reranker=reranker, timer=timer)
+        for _ in stream_answer(llm, query, docs, timer):
+            pass
+        ttft.append(timer.first_token or timer.total)
+        total.append(timer.total)
+    return {"ttft": percentiles(ttft), "total": percentiles(total)}
+
+
+# API 호출 없이 end-to-end 경로를 재기 위한 LLM (고정 지연 후 토큰 몇 개를 흘려 보냄)
+class StubChunk:
+    def __init__(self, content):
+        self.content = content
+
+class StubStreamingLLM:
+    def __init__(self, delay=0.2, tokens=20):
+        self.delay = delay
+        self.tokens = tokens
+
+    def stream(self, messages):
+        time.sleep(self.delay)
+        for i in range(self.tokens):
+            yield StubChunk(f"t{i} ")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_result(result, out_dir=BENCH_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+def print_row(name, stats):
+    print(f"{name:<16} n={stats['n']:<5} p50 {stats['p50_ms']:8.1f}ms  p95 {stats['p95_ms']:8.1f}ms  "
+          f"p99 {stats['p99_ms']:8.1f}ms" + (f"  {stats['qps']:7.1f} QPS" if "qps" in stats else ""))
+
+
+def run_bench(args, embedding_factory, llm=None):
+    from vector_index import index_version, DEFAULT_INDEX_TYPE
+
+    queries = [case["query"] for case in load_testset(args.testset)]
+    reranker = load_reranker()
+    embedding, db, cold = run_cold(embedding_factory, args.vector_dir, queries[0], args.k, reranker)
+    print(f"🧊 cold: 모델 {cold['model_load_s']:.2f}s · 인덱스 {cold['index_load_s']:.2f}s · "
+          f"첫 질의 {cold['first_query_s'] * 1000:.0f}ms")
+
+    warm = run_warm(db, embedding, queries, args.k, reranker, args.rounds, args.warmup)
+    print_row("warm", warm)
+    concurrent = []
+    for clients in args.concurrency:
+        stats = run_concurrent(db, embedding, queries, args.k, reranker, clients, args.rounds)
+        print_row(f"clients={clients}", stats)
+        concurrent.append(stats)
+
+    e2e = None
+    if llm is not None:
+        e2e = run_e2e(db, embedding, llm, queries, args.k, reranker)
+        print_row("e2e ttft", e2e["ttft"])
+        print_row("e2e total", e2e["total"])
+
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "config": {
+            "testset": args.testset,
+            "queries": len(queries),
+            "vector_dir": args.vector_dir,
+            "index_version": index_version(args.vector_dir),
+            "index_type": db.get_meta("index_type", DEFAULT_INDEX_TYPE),
+            "chunks": db.count,
+            "embedding_model": os.getenv("EMBEDDING_MODEL"),
+            "retrieval_mode": db.mode,
+            "reranker": reranker.model_name if reranker is not None else None,
+            "k": args.k,
+            "rounds": args.rounds,
+        },
+        "cold": cold,
+        "warm_retrieval": warm,
+        "concurrent_retrieval": concurrent,
+        "e2e": e2e,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--testset", default=TESTSET_PATH)
+    parser.add_argument("--vector-dir", default="vectordb")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=5, help="질의 목록 반복 횟수")
+    parser.add_argument("--warmup", type=int, default=3, help="측정 전 버리는 질의 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--e2e", action="store_true", help="LLM 답변까지 포함한 TTFT / 전체 시간 측정")
+    parser.add_argument("--stub-llm", action="store_true", help="--e2e에서 OpenAI 대신 고정 지연 stub 사용")
+    parser.add_argument("--out-dir", default=BENCH_DIR)
+
+def main(args):
+    load_dotenv()
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    def embedding_factory():
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=os.getenv("EMBEDDING_MODEL"))
+
+    llm = None
+    if args.e2e:
+        if args.stub_llm:
+            llm = StubStreamingLLM()
+        else:
+            from langchain_openai import ChatOpenAI
+            llm = ChatOpenAI(temperature=0.2, model_name="gpt-4.1", openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+    result = run_bench(args, embedding_factory, llm)
+    print(f"💾 결과 저장: {write_result(result, args.out_dir)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Learnmate 검색 / end-to-end 벤치마크")
+    add_arguments(parser)
+    main(parser.parse_args())
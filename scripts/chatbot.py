@@ -2,18 +2,19 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 
-from langchain_community.vectorstores import FAISS
 from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import RetrievalQA
-import argparse
+
+from embedder import load_embedding
+from vector_index import SharedIndex, index_version
+from rag import RequestTimer, retrieve, stream_answer, source_titles, log_latency
+from answer_cache import SemanticAnswerCache
+from reranker import load_reranker
 
 os.environ["PYTORCH_ENABLE_MPS_FALLBACK"] = "1"
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 pdf_dir = "/Users/jeong/AI/learnmate/data/abstracts"
-file_count = len([f for f in os.listdir(pdf_dir) if os.path.isfile(os.path.join(pdf_dir, f))])
+VECTOR_DIR = "vectordb"
 
 
 # 환경 설정
@@ -21,62 +22,119 @@ load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY not found in .env file")
+WARMUP = os.getenv("LEARNMATE_WARMUP", "1") != "0"  # 서버 프로세스 첫 실행 때 모델/인덱스 미리 로드
+
+# =========================
+# 프로세스 단위 캐시 리소스 (Streamlit rerun마다 다시 만들지 않음)
+# =========================
+# ingest / evaluation과 같은 디스크 임베딩 캐시 사용 → 이미 들어온 질문은 모델 forward 없이 벡터 재사용
+@st.cache_resource(show_spinner=False)
+def get_embedding():
+    return load_embedding(os.getenv("EMBEDDING_MODEL"), verbose=False)
+
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    return ChatOpenAI(
+        temperature=0.2,
+        model_name="gpt-4.1",
+        openai_api_key=openai_api_key
+    )
+
+# 모든 세션이 공유하는 인덱스: VERSION이 바뀌면(파이프라인이 인덱스를 다시 저장하면) 한 번만 새로 로드하고,
+# 이전 인덱스는 검색 중인 세션이 모두 끝나면 닫음 (SQLite 연결 / mmap 해제)
+@st.cache_resource(show_spinner=False)
+def get_shared_index():
+    return SharedIndex(VECTOR_DIR, get_embedding())
+
+def acquire_index(version):
+    shared = get_shared_index()
+    try:
+        if shared.version != version:
+            with st.spinner("벡터 DB 불러오는 중..."):
+                return shared.acquire()
+        return shared.acquire()
+    except Exception as e:
+        raise ValueError(f"❌ FAISS 로딩 오류: {e}")
+
+# RERANK_MODEL이 설정된 경우에만 cross-encoder 로드 (없으면 None)
+@st.cache_resource(show_spinner=False)
+def get_reranker():
+    return load_reranker()
+
+# 서버 프로세스 전체(모든 세션)가 공유하는 질문 → 답변 semantic cache
+@st.cache_resource(show_spinner=False)
+def get_answer_cache():
+    return SemanticAnswerCache()
 
-# 벡터 DB 로드
-embedding = HuggingFaceEmbeddings(model_name=os.getenv("EMBEDDING_MODEL"))
-try:
-    db = FAISS.load_local("vectordb", embedding, allow_dangerous_deserialization=True)
-    retriever = db.as_retriever(search_kwargs={"k": 2})
-except Exception as e:
-    raise ValueError(f"❌ FAISS 로딩 오류: {e}")
-
-# LLM 설정
-llm = ChatOpenAI(
-    temperature=0.2,
-    model_name="gpt-4.1", 
-    openai_api_key=openai_api_key
-)
-
-# 시스템 프롬프트 설정
-system_prompt = (
-    "your persona: 중고등학생의 학업 고민을 들어주는 따뜻하고 전략적인 대학생 멘토"
-    "선배가 후배에게 조언하듯 friendly and gentle mood를 유지, 친근한 반말로 답변"
-    "먼저 질문자의 상황에 공감하고, 이어서 [전략 → 실천] 구조로 답변할 것"
-    "답변의 학술적 근거는 /Users/jeong/AI/learnmate/data/abstracts 내의 데이터에 기반할 것"
-)
-
-prompt = ChatPromptTemplate.from_messages([
-    ("system", system_prompt),
-    ("human", "질문: {question}\n\n📎 참고 문서:\n{context}")
-])
-
-# QA 체인 생성
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    chain_type="stuff",
-    return_source_documents=True,
-    chain_type_kwargs={"prompt": prompt}
-)
-
-# 질문 처리 함수
+@st.cache_resource(show_spinner="모델 준비 중...")
+def warm_up():
+    # 임베딩 모델의 첫 forward pass(lazy 초기화 포함)를 미리 치러 둠
+    get_embedding().embed_query("warm-up")
+    get_shared_index().load()
+    if get_reranker() is not None:
+        get_reranker().warm_up()
+    get_llm()
+    return True
+
+@st.cache_data(ttl=300, show_spinner=False)
+def count_papers():
+    return len([f for f in os.listdir(pdf_dir) if os.path.isfile(os.path.join(pdf_dir, f))])
+
+# 질문 처리: 질문 임베딩은 한 번만 계산해서 답변 캐시 조회와 벡터 검색에 같이 사용
+#   캐시 적중 → 저장된 답변을 바로 표시 / 미스 → 검색 결과(출처)를 먼저 보여 주고 답변은 토큰 단위로 스트리밍
 def ask_rag(question):
+    timer = RequestTimer()
     try:
-        result = qa_chain.invoke({"query": question})
-        return result["result"]
+        version = index_version(VECTOR_DIR)
+        cache = get_answer_cache()
+        vector = get_embedding().embed_query(question)
+
+        cached = cache.lookup(vector, version)
+        if cached is not None:
+            timer.mark_retrieval()
+            if cached["sources"]:
+                st.caption("📎 참고 논문: " + " · ".join(cached["sources"]))
+            st.success("이렇게 해 봐요!")
+            st.markdown(cached["answer"])
+            timer.mark_token()
+            timer.finish()
+            st.caption(f"⚡ 비슷한 질문의 답변 재사용 (유사도 {cached['similarity']:.3f}) · 전체 {timer.total:.2f}s")
+            log_latency(question, timer, sources=cached["sources"], cache_hit=True,
+                        similarity=cached["similarity"], cache=cache.stats())
+            return
+
+        db, version = acquire_index(version)
+        try:
+            docs = retrieve(db, question, 2, vector=vector, reranker=get_reranker(), timer=timer)
+        finally:
+            get_shared_index().release(db)
+
+        titles = source_titles(docs)
+        if titles:
+            st.caption("📎 참고 논문: " + " · ".join(titles))
+
+        st.success("이렇게 해 봐요!")
+        answer = st.write_stream(stream_answer(get_llm(), question, docs, timer))
+        rerank_note = f" · rerank {timer.rerank * 1000:.0f}ms" if timer.rerank is not None else ""
+        st.caption(f"⏱ 첫 응답 {timer.first_token or 0:.2f}s · 전체 {timer.total or 0:.2f}s{rerank_note}")
+        if isinstance(answer, str) and answer:
+            cache.store(question, vector, answer, titles, version)
+        log_latency(question, timer, sources=titles, cache_hit=False, cache=cache.stats())
     except Exception as e:
         print(f"❌ 오류: {e}")
-        return f"오류가 발생했습니다: {e}"
+        st.error(f"오류가 발생했습니다: {e}")
 
 # Streamlit UI
 st.set_page_config(page_title="Learnmate", layout="wide")
+if WARMUP:
+    warm_up()
 st.title("Learnmate: 학습 고민을 나누어요!")
-st.markdown(f"{file_count}편의 최신 교육 논문에 기반해서, 당신의 학습 고민을 과학적으로 해소해 드립니다.")
+st.markdown(f"{count_papers()}편의 최신 교육 논문에 기반해서, 당신의 학습 고민을 과학적으로 해소해 드립니다.")
 
 question = st.text_input("무엇을 도와 드릴까요? 구체적으로 질문할수록, 자세하게 대답해 드릴 수 있어요!")
 
 if question:
-    with st.spinner("대답을 고민하는 중..."):
-        answer = ask_rag(question)
-        st.success("이렇게 해 봐요!")
-        st.write(answer)
+    ask_rag(question)
+
+stats = get_answer_cache().stats()
+st.sidebar.caption(f"답변 캐시: {stats['size']}개 · 적중률 {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})")
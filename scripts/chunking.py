@@ -0,0 +1,135 @@
+import re
+import time
+import argparse
+from functools import lru_cache
+
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?。？！])\s+|\n")
+
+
+# 실제 토크나이저로 토큰 수를 셈 (OpenAI 모델은 tiktoken, 그 외는 HuggingFace 토크나이저)
+class TokenCounter:
+    def __init__(self, model_name):
+        self.model_name = model_name
+        if model_name.startswith(("gpt-", "o1", "o3", "o4", "text-embedding-")):
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                encoding = tiktoken.get_encoding("o200k_base")
+            self.encode = encoding.encode
+            self.decode = encoding.decode
+        else:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            self.encode = lambda text: tokenizer.encode(text, add_special_tokens=False)
+            self.decode = tokenizer.decode
+
+    def count(self, text):
+        return len(self.encode(text))
+
+@lru_cache(maxsize=None)
+def token_counter(model_name):
+    return TokenCounter(model_name)
+
+
+def _iter_paragraphs(text):
+    start = 0
+    for match in PARAGRAPH_SPLIT.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+def _iter_sentences(text):
+    start = 0
+    for match in SENTENCE_SPLIT.finditer(text):
+        yield text[start:match.end()]
+        start = match.end()
+    yield text[start:]
+
+# (조각, 토큰 수, 구분자) 단위: 문단 → 너무 길면 문장 → 그래도 길면 토큰 단위로 자름
+def _iter_units(text, max_tokens, counter):
+    for paragraph in _iter_paragraphs(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = counter.count(paragraph)
+        if tokens <= max_tokens:
+            yield paragraph, tokens, "\n\n"
+            continue
+        for sentence in _iter_sentences(paragraph):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            ids = counter.encode(sentence)
+            if len(ids) <= max_tokens:
+                yield sentence, len(ids), " "
+                continue
+            for i in range(0, len(ids), max_tokens):
+                piece = counter.decode(ids[i:i + max_tokens])
+                yield piece, len(ids[i:i + max_tokens]), " "
+
+
+# 문단/문장 경계를 지키며 max_tokens 이하의 chunk를 하나씩 생성 (generator)
+def iter_chunks(text, max_tokens, counter, overlap_tokens=0):
+    window, size = [], 0
+    for unit, tokens, sep in _iter_units(text, max_tokens, counter):
+        if window and size + tokens > max_tokens:
+            yield _join(window)
+            # overlap: 직전 chunk의 마지막 조각들을 overlap_tokens 한도 안에서 이어붙임
+            carry, carry_size = [], 0
+            for item in reversed(window):
+                if carry_size + item[1] > overlap_tokens or carry_size + item[1] + tokens > max_tokens:
+                    break
+                carry.insert(0, item)
+                carry_size += item[1]
+            window, size = carry, carry_size
+        window.append((unit, tokens, sep))
+        size += tokens
+    if window:
+        yield _join(window)
+
+def _join(window):
+    parts = [window[0][0]]
+    for unit, _, sep in window[1:]:
+        parts.append(sep + unit)
+    return "".join(parts)
+
+def chunk_text(text, max_tokens, model_name, overlap_tokens=0):
+    return list(iter_chunks(text, max_tokens, token_counter(model_name), overlap_tokens))
+
+
+# =========================
+# micro-benchmark: python scripts/chunking.py --bench <file> [--model gpt-4.1] [--max-tokens 5000]
+# =========================
+def _legacy_chunks(text, max_tokens):
+    from textwrap import TextWrapper
+    return TextWrapper(width=max_tokens * 4, break_long_words=False).wrap(text)
+
+def _report(name, chunks, elapsed, counter, max_tokens):
+    sizes = [counter.count(c) for c in chunks] or [0]
+    over = sum(1 for s in sizes if s > max_tokens)
+    print(f"{name:<10} {elapsed * 1000:9.1f}ms | chunk {len(chunks):4d}개 | "
+          f"토큰 min {min(sizes)} / 평균 {sum(sizes) // len(sizes)} / max {max(sizes)} | 초과 {over}개")
+
+def run_benchmark(path, model_name, max_tokens, repeat):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    counter = token_counter(model_name)
+    print(f"📏 {path}: {len(text)}자, {counter.count(text)}토큰 ({model_name}, max {max_tokens})")
+
+    for name, fn in [("textwrap", lambda: _legacy_chunks(text, max_tokens)),
+                     ("chunking", lambda: list(iter_chunks(text, max_tokens, counter)))]:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            chunks = fn()
+        _report(name, chunks, (time.perf_counter() - start) / repeat, counter, max_tokens)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="chunker micro-benchmark")
+    parser.add_argument("--bench", required=True, help="측정할 텍스트(.md/.txt) 파일")
+    parser.add_argument("--model", default="gpt-4.1")
+    parser.add_argument("--max-tokens", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.bench, args.model, args.max_tokens, args.repeat)
@@ -1,13 +1,16 @@
 import os
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.docstore.document import Document
+import argparse
+
+from chunking import iter_chunks, token_counter
 
 MD_DIR = "/Users/jeong/AI/learnmate/data/abstracts"
 VECTOR_DIR = "vectordb_md"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_TOKENS = 200  # all-MiniLM-L6-v2 max_seq_length(256) 이내
+CHUNK_OVERLAP = 20
 
 def load_md_documents(md_dir):
+    from langchain.docstore.document import Document
     documents = []
     for filename in os.listdir(md_dir):
         if filename.endswith(".md"):
@@ -17,20 +20,37 @@ def load_md_documents(md_dir):
                 documents.append(Document(page_content=content, metadata={"source": filename}))
     return documents
 
-def build_vector_db(documents):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.split_documents(documents)
+def build_vector_db(documents, rebuild=False):
+    from langchain.docstore.document import Document
+    from vector_index import update_index
+    from embedder import load_embedding
 
-    embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    db = FAISS.from_documents(chunks, embedding)
-    db.save_local(VECTOR_DIR)
-    print(f"✅ 벡터 DB 저장 완료: {VECTOR_DIR} (총 {len(chunks)}개 조각)")
+    counter = token_counter(EMBEDDING_MODEL)
 
-if __name__ == "__main__":
+    def split_fn(source, text):
+        chunks = iter_chunks(text, CHUNK_TOKENS, counter, CHUNK_OVERLAP)
+        return [Document(page_content=c, metadata={"source": source, "chunk_idx": i}) for i, c in enumerate(chunks)]
+
+    sources = {doc.metadata["source"]: doc.page_content for doc in documents}
+    with load_embedding(EMBEDDING_MODEL) as embedding:
+        db = update_index(VECTOR_DIR, embedding, sources, split_fn,
+                          model_name=EMBEDDING_MODEL, prune=True, rebuild=rebuild)
+    total = db.index.ntotal if db is not None else 0
+    print(f"✅ 벡터 DB 저장 완료: {VECTOR_DIR} (총 {total}개 조각)")
+
+def add_arguments(parser):
+    parser.add_argument("--rebuild", action="store_true", help="기존 인덱스를 무시하고 전체 재생성")
+
+def main(args):
     print("📂 MD 요약 파일 로딩 중...")
     docs = load_md_documents(MD_DIR)
     if not docs:
         print("❌ .md 문서가 없습니다.")
     else:
         print(f"📄 {len(docs)}개 문서 로딩 완료")
-        build_vector_db(docs)
+        build_vector_db(docs, rebuild=args.rebuild)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="요약 .md 파일로 벡터 DB 생성/갱신")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,92 @@
+import os
+import time
+
+from embedding_cache import CachedEmbeddings
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_PROCESSES = int(os.getenv("EMBED_PROCESSES", "0"))  # CPU 멀티 프로세스 수 (0/1이면 단일 프로세스)
+EMBED_DEVICE = os.getenv("EMBED_DEVICE")  # 비우면 sentence-transformers가 자동 선택
+EMBED_REPORT_EVERY = 5.0  # 진행 상황 출력 간격(초)
+EMBED_CACHE = os.getenv("EMBED_CACHE", "1") != "0"  # 0이면 임베딩 캐시 사용 안 함
+
+
+# 인덱스 생성용 임베딩: 길이순 배치(padding 최소화) + CPU 멀티 프로세스 + 처리량 출력
+# LangChain Embeddings와 같은 인터페이스(embed_documents / embed_query), import 시간을 줄이려고 langchain_core는 상속하지 않음
+class BatchEmbedder:
+    def __init__(self, model_name, batch_size=EMBED_BATCH_SIZE, processes=EMBED_PROCESSES,
+                 device=EMBED_DEVICE, verbose=True):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.processes = processes
+        self.verbose = verbose
+        self.device = device
+        self._model = None
+        self._pool = None
+
+    # 캐시에서 전부 찾으면 모델을 아예 로드하지 않도록 처음 쓸 때 로드 (torch import도 이때)
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def _start_pool(self):
+        if self._pool is None:
+            print(f"🧵 임베딩 프로세스 풀 시작 ({self.processes}개)")
+            self._pool = self.model.start_multi_process_pool(["cpu"] * self.processes)
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _encode(self, texts):
+        # 여러 프로세스로 나눌 만큼 양이 많을 때만 풀 사용
+        if self.processes > 1 and len(texts) > self.batch_size * self.processes:
+            return self.model.encode_multi_process(
+                texts, self._start_pool(), batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, len(texts) // (self.processes * 4)),
+            )
+        return self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False)
+
+    def embed_documents(self, texts):
+        # HuggingFaceEmbeddings와 같은 전처리 → 질의 쪽 벡터와 호환
+        texts = [t.replace("\n", " ") for t in texts]
+        if not texts:
+            return []
+
+        # 길이순 정렬 → 비슷한 길이끼리 같은 배치 → 원래 순서로 복원
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        vectors = [None] * len(texts)
+        step = self.batch_size * max(1, self.processes) * 4
+
+        start = last_report = time.perf_counter()
+        for offset in range(0, len(order), step):
+            idx = order[offset:offset + step]
+            for i, vec in zip(idx, self._encode([texts[i] for i in idx])):
+                vectors[i] = vec.tolist()
+
+            now = time.perf_counter()
+            done = offset + len(idx)
+            finished = done == len(texts) and len(texts) > self.batch_size
+            if self.verbose and (now - last_report >= EMBED_REPORT_EVERY or finished):
+                last_report = now
+                print(f"🧠 임베딩 {done}/{len(texts)} ({done / (now - start):.1f} docs/s)")
+        return vectors
+
+    def embed_query(self, text):
+        return self.model.encode(text.replace("\n", " "), show_progress_bar=False).tolist()
+
+
+# 모든 진입점(embed / pipeline / evaluation)에서 쓰는 임베딩: BatchEmbedder + 디스크 캐시
+def load_embedding(model_name, **kwargs):
+    embedder = BatchEmbedder(model_name, **kwargs)
+    return CachedEmbeddings(embedder, model_name) if EMBED_CACHE else embedder
@@ -0,0 +1,142 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+import numpy as np
+
+EMBED_CACHE_DIR = os.getenv("EMBED_CACHE_DIR", "data/cache/embeddings")
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.sqlite"
+
+
+def normalize_text(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+def text_hash(text, kind="d"):
+    # kind: 문서(d)/질의(q) 임베딩을 구분 (모델에 따라 다를 수 있음)
+    return hashlib.sha1(f"{kind}:{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+# (모델, 정규화 텍스트 hash) → 벡터
+#   vectors.f32: float32 행렬을 이어 붙인 파일 (np.memmap으로 읽음)
+#   index.sqlite: hash → 행 번호
+class EmbeddingCache:
+    def __init__(self, model_name, cache_dir=EMBED_CACHE_DIR):
+        self.dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        os.makedirs(self.dir, exist_ok=True)
+        self.vectors_path = os.path.join(self.dir, VECTORS_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._mmap = None
+
+        self._conn = sqlite3.connect(os.path.join(self.dir, INDEX_FILE), check_same_thread=False, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    @property
+    def dim(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        return int(row[0]) if row else None
+
+    def _rows(self, dim):
+        # 다른 프로세스가 파일을 늘렸을 수 있으므로 필요할 때 다시 매핑
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        count = size // (dim * 4)
+        if self._mmap is None or self._mmap.shape[0] < count:
+            self._mmap = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(count, dim)) if count else None
+        return self._mmap
+
+    def get_many(self, hashes):
+        found = {}
+        with self._lock:
+            dim = self.dim
+            if dim is None:
+                self.misses += len(hashes)
+                return found
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                found.update(self._conn.execute(f"SELECT hash, row FROM rows WHERE hash IN ({marks})", batch))
+            vectors = self._rows(dim) if found else None
+            result = {h: np.array(vectors[row]) for h, row in found.items() if vectors is not None and row < len(vectors)}
+            self.hits += len(result)
+            self.misses += len(hashes) - len(result)
+            return result
+
+    def put_many(self, hashes, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(hashes):
+            return
+        with self._lock:
+            # BEGIN IMMEDIATE: 행 번호 할당과 파일 쓰기를 다른 프로세스와 직렬화
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dim = self.dim
+                if dim is None:
+                    dim = vectors.shape[1]
+                    self._conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+                elif dim != vectors.shape[1]:
+                    raise ValueError(f"임베딩 차원 불일치: cache {dim}, 입력 {vectors.shape[1]}")
+
+                existing = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+                start = existing // (dim * 4)
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(start * dim * 4)
+                    f.write(vectors.tobytes())
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO rows (hash, row) VALUES (?, ?)",
+                    [(h, start + i) for i, h in enumerate(hashes)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+# 기존 Embeddings 객체 앞에 캐시를 두는 wrapper (miss만 실제 모델로 계산), 인터페이스는 LangChain Embeddings와 같음
+class CachedEmbeddings:
+    def __init__(self, base, model_name, cache_dir=EMBED_CACHE_DIR):
+        self.base = base
+        self.model_name = model_name
+        self.cache = EmbeddingCache(model_name, cache_dir)
+
+    def _embed(self, texts, kind, compute):
+        hashes = [text_hash(t, kind) for t in texts]
+        unique = list(dict.fromkeys(hashes))
+        found = self.cache.get_many(unique)
+
+        missing = [h for h in unique if h not in found]
+        if missing:
+            first_text = {}
+            for h, t in zip(hashes, texts):
+                first_text.setdefault(h, t)
+            computed = compute([first_text[h] for h in missing])
+            self.cache.put_many(missing, computed)
+            found.update(zip(missing, (np.asarray(v, dtype=np.float32) for v in computed)))
+
+        return [found[h].tolist() for h in hashes]
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        return self._embed(texts, "d", self.base.embed_documents)
+
+    def embed_query(self, text):
+        return self._embed([text], "q", lambda ts: [self.base.embed_query(t) for t in ts])[0]
+
+    def close(self):
+        if hasattr(self.base, "close"):
+            self.base.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,107 +1,141 @@
 import os
 import time
+import argparse
 import numpy as np
 from dotenv import load_dotenv
-from langchain_community.vectorstores import FAISS
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains import RetrievalQA
-from sklearn.metrics.pairwise import cosine_similarity
-
-# === 환경 설정 === #
-os.environ["TOKENIZERS_PARALLELISM"] = "false"  # 병렬 경고 제거
-load_dotenv()
-
-openai_api_key = os.getenv("OPENAI_API_KEY")
-embedding_model_name = os.getenv("EMBEDDING_MODEL")
-
-if not openai_api_key:
-    raise ValueError("❌ OPENAI_API_KEY not found in .env file")
-if not embedding_model_name:
-    raise ValueError("❌ EMBEDDING_MODEL not found in .env file")
-
-# === 임베딩 및 DB 로딩 === #
-embedding = HuggingFaceEmbeddings(model_name=embedding_model_name)
-
-db = FAISS.load_local("vectordb", embedding, allow_dangerous_deserialization=True)
-retriever = db.as_retriever(search_kwargs={"k": 5})
-
-# === LLM 설정 === #
-llm = ChatOpenAI(
-    temperature=0.2,
-    model_name="gpt-4.1",
-    openai_api_key=openai_api_key
-)
-
-qa_chain = RetrievalQA.from_chain_type(
-    llm=llm,
-    retriever=retriever,
-    chain_type="stuff",
-    return_source_documents=True
-)
+
+from testset import load_testset, TESTSET_PATH
+
+VECTOR_DIR = "vectordb"
+
+
+# === 임베딩 / DB / LLM 로딩 === #
+# 평가를 실제로 실행할 때만 로드 (import만으로는 모델·인덱스·OpenAI 클라이언트를 만들지 않음)
+def build_qa():
+    from langchain_openai import ChatOpenAI
+    from langchain.chains import RetrievalQA
+
+    from embedder import load_embedding
+    from vector_index import load_index
+    from reranker import load_reranker
+
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    embedding_model_name = os.getenv("EMBEDDING_MODEL")
+    if not openai_api_key:
+        raise ValueError("❌ OPENAI_API_KEY not found in .env file")
+    if not embedding_model_name:
+        raise ValueError("❌ EMBEDDING_MODEL not found in .env file")
+
+    # 기대 답변/질의 임베딩은 디스크 캐시에서 재사용 → 반복 평가 시 모델 추론 없음
+    embedding = load_embedding(embedding_model_name, verbose=False)
+
+    db = load_index(VECTOR_DIR, embedding)
+    reranker = load_reranker(top_n=5)  # RERANK_MODEL 설정 시 후보를 넓게 가져와 상위 5개로 rerank
+    retriever = db.as_retriever(search_kwargs={"k": 5}, reranker=reranker)
+
+    llm = ChatOpenAI(
+        temperature=0.2,
+        model_name="gpt-4.1",
+        openai_api_key=openai_api_key
+    )
+
+    qa_chain = RetrievalQA.from_chain_type(
+        llm=llm,
+        retriever=retriever,
+        chain_type="stuff",
+        return_source_documents=True
+    )
+    return embedding, retriever, qa_chain
 
 # === 평가 함수 === #
-def cosine_sim(text1, text2, embedding_model):
-    emb1 = embedding_model.embed_documents([text1])[0]
-    emb2 = embedding_model.embed_documents([text2])[0]
-    return cosine_similarity([emb1], [emb2])[0][0]
-
-def evaluate_accuracy(retrieved, expected, embedding_model, threshold=0.4):
-    tp, fn = 0, 0
-    for e in expected:
-        if any(cosine_sim(r, e, embedding_model) >= threshold for r in retrieved):
-            tp += 1
-        else:
-            fn += 1
-    fp = len(retrieved) - tp
+# 평가에 등장하는 모든 텍스트(검색 결과, 기대 답변, LLM 답변)를 중복 없이 한 번에 배치 임베딩
+# → {text: 정규화 벡터}, 코사인 유사도는 정규화 벡터의 내적 (행렬곱 한 번)
+def embed_texts(texts, embedding_model):
+    unique = list(dict.fromkeys(texts))
+    if not unique:
+        return {}
+    vectors = np.asarray(embedding_model.embed_documents(unique), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+    return dict(zip(unique, vectors))
+
+def similarity_matrix(texts_a, texts_b, vectors):
+    a = np.stack([vectors[t] for t in texts_a])
+    b = np.stack([vectors[t] for t in texts_b])
+    return a @ b.T
+
+# sims: |검색 결과| × |기대 답변| 유사도 행렬, 기대 답변마다 검색 결과 중 하나라도 threshold 이상이면 TP
+def evaluate_accuracy(sims, threshold=0.4):
+    if sims.size == 0:
+        return 0, 0, 0
+    tp = int((sims.max(axis=0) >= threshold).sum())
+    fn = sims.shape[1] - tp
+    fp = sims.shape[0] - tp
     prec = tp / (tp + fp) if (tp + fp) else 0
     rec = tp / (tp + fn) if (tp + fn) else 0
     f1 = 2 * prec * rec / (prec + rec) if (prec + rec) else 0
     return prec, rec, f1
 
-def evaluate_query(query, expected, embedding_model, retriever, threshold=0.35):
-    start = time.time()
+def retrieve_case(query, retriever):
+    start = time.perf_counter()
     results = retriever.invoke(query)
-    elapsed = time.time() - start
-    retrieved = [doc.page_content for doc in results[:10]]
-    prec, rec, f1 = evaluate_accuracy(retrieved, expected, embedding_model, threshold)
-    return elapsed, prec, rec, f1, retrieved
+    elapsed = time.perf_counter() - start
+    return elapsed, [doc.page_content for doc in results[:10]]
 
-def evaluate_answer(query, expected, chain):
+def answer_case(query, chain):
     try:
-        start = time.time()
+        start = time.perf_counter()
         result = chain.invoke({"query": query})
-        elapsed = time.time() - start
-        answer = result["result"]
-        sim = max(cosine_sim(answer, e, embedding) for e in expected)
-        return elapsed, answer, sim
+        return time.perf_counter() - start, result["result"], True
     except Exception as e:
-        return 0, str(e), 0
+        return 0, str(e), False
+
+# 1) 검색 / LLM 답변을 모두 모은 뒤 2) 모든 텍스트를 한 번에 임베딩하고 3) 행렬 연산으로 지표 계산
+def run_evaluation(testset, retriever, chain, embedding_model, threshold=0.35):
+    cases = []
+    for case in testset:
+        db_time, retrieved = retrieve_case(case["query"], retriever)
+        ans_time, answer, ok = answer_case(case["query"], chain) if chain is not None else (0, "", False)
+        cases.append({**case, "db_time": db_time, "retrieved": retrieved,
+                      "ans_time": ans_time, "answer": answer, "answered": ok})
+
+    # 행: 검색 결과 + LLM 답변, 열: 기대 답변 → 전체 유사도 행렬을 행렬곱 한 번으로 계산한 뒤 케이스별로 잘라 씀
+    rows = list(dict.fromkeys(t for case in cases for t in case["retrieved"] + ([case["answer"]] if case["answered"] else [])))
+    cols = list(dict.fromkeys(t for case in cases for t in case["expected"]))
+    start = time.perf_counter()
+    vectors = embed_texts(rows + cols, embedding_model)
+    sims = similarity_matrix(rows, cols, vectors) if rows and cols else np.zeros((len(rows), len(cols)))
+    print(f"🧮 평가 임베딩: 고유 텍스트 {len(vectors)}개, 유사도 행렬 {sims.shape[0]}×{sims.shape[1]} "
+          f"({time.perf_counter() - start:.2f}s)")
+    row_of = {t: i for i, t in enumerate(rows)}
+    col_of = {t: i for i, t in enumerate(cols)}
+
+    for case in cases:
+        expected = [col_of[t] for t in case["expected"]]
+        retrieved = [row_of[t] for t in case["retrieved"]]
+        case["precision"], case["recall"], case["f1"] = evaluate_accuracy(sims[np.ix_(retrieved, expected)], threshold)
+        case["answer_sim"] = float(sims[row_of[case["answer"]], expected].max()) \
+            if case["answered"] and expected else 0
+    return cases
 
 # === 실행 === #
-if __name__ == "__main__":
-    testset = [
-        {
-            "query": "학습 전략의 종류는 무엇인가요?",
-            "expected": [
-                "학습 전략에는 인지 전략, 메타인지 전략, 자원 관리 전략이 포함됩니다.",
-                "메타인지 전략은 자신의 학습을 계획, 모니터링, 평가하는 전략입니다."
-            ]
-        },
-        {
-            "query": "학생의 자기조절 학습 방법에 대해 설명해줘.",
-            "expected": [
-                "자기조절 학습은 목표 설정, 자기 모니터링, 자기 평가를 포함합니다.",
-                "학생들은 목표를 설정하고 학습 과정 중 자신을 점검하며 평가합니다."
-            ]
-        }
-    ]
-
-    for i, case in enumerate(testset, 1):
-        print(f"\n🧪 테스트 {i}: {case['query']}")
+def add_arguments(parser):
+    parser.add_argument("--testset", default=TESTSET_PATH, help="JSONL: {\"query\": ..., \"expected\": [...]}")
 
-        db_time, prec, rec, f1, retrieved = evaluate_query(case["query"], case["expected"], embedding, retriever)
-        print(f"🔍 검색 시간: {db_time:.2f}s | Precision: {prec:.3f} | Recall: {rec:.3f} | F1: {f1:.3f}")
+def main(args):
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"  # 병렬 경고 제거
+    load_dotenv()
+    testset = load_testset(args.testset)
+    embedding, retriever, qa_chain = build_qa()
 
-        ans_time, answer, sim = evaluate_answer(case["query"], case["expected"], qa_chain)
-        print(f"🧠 응답 시간: {ans_time:.2f}s | 유사도: {sim:.3f}\n📝 답변 요약: {answer[:100]}...")
+    for i, case in enumerate(run_evaluation(testset, retriever, qa_chain, embedding), 1):
+        print(f"\n🧪 테스트 {i}: {case['query']}")
+        print(f"🔍 검색 시간: {case['db_time']:.2f}s | Precision: {case['precision']:.3f} | "
+              f"Recall: {case['recall']:.3f} | F1: {case['f1']:.3f}")
+        print(f"🧠 응답 시간: {case['ans_time']:.2f}s | 유사도: {case['answer_sim']:.3f}\n"
+              f"📝 답변 요약: {case['answer'][:100]}...")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 / 답변 품질 평가")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+import os
+import time
+import queue
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "120"))  # 문서당 최대 추출 시간(초)
+EXTRACT_MAX_PAGES = int(os.getenv("EXTRACT_MAX_PAGES", "80"))  # 문서당 최대 페이지 수 (0이면 제한 없음)
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+# 페이지 단위로 텍스트를 흘려보냄 → 문서 전체를 한 번에 들고 있지 않음
+def iter_pdf_pages(pdf_path, max_pages=EXTRACT_MAX_PAGES):
+    import pdfplumber  # 추출할 PDF가 있을 때만 (워커 프로세스마다 처음 한 번)
+    with pdfplumber.open(pdf_path) as pdf:
+        for idx, page in enumerate(pdf.pages):
+            if max_pages and idx >= max_pages:
+                break
+            yield page.extract_text() or ""
+            page.close()  # 페이지별 layout 캐시 해제
+
+# 워커 프로세스에서 실행: (text, error, 페이지 수, 소요 시간) 반환, 시간 초과 시 그때까지 읽은 페이지만 반환
+def _extract_worker(pdf_path, max_pages, timeout):
+    start = time.perf_counter()
+    text, error, pages = _extract_pages(pdf_path, max_pages, timeout)
+    return text, error, pages, time.perf_counter() - start
+
+def _extract_pages(pdf_path, max_pages, timeout):
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    pages = []
+    try:
+        for text in iter_pdf_pages(pdf_path, max_pages):
+            pages.append(text)
+        return "\n".join(pages).strip(), None, len(pages)
+    except ExtractionTimeout:
+        return "\n".join(pages).strip(), f"{timeout:.0f}초 초과 ({len(pages)}페이지까지 추출)", len(pages)
+    except Exception as e:
+        return "", str(e), len(pages)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def extract_text_from_pdf(pdf_path, max_pages=EXTRACT_MAX_PAGES, timeout=EXTRACT_TIMEOUT):
+    text, error, _, _ = _extract_worker(pdf_path, max_pages, timeout)
+    if error:
+        print(f"❌ PDF 로딩 실패 ({pdf_path}): {error}")
+    return text
+
+# (key, pdf_path)를 받아 프로세스 풀에서 추출, 끝나는 순서대로 (key, pdf_path, text) 반환
+# items가 generator여도 별도 스레드가 계속 제출하므로 소비 측(요약)과 추출이 겹쳐서 진행됨
+# metrics(RunMetrics)를 넘기면 문서별 추출 시간(워커 기준) / 페이지 수 / 글자 수 기록
+def extract_many(items, workers=EXTRACT_WORKERS, max_pages=EXTRACT_MAX_PAGES, timeout=EXTRACT_TIMEOUT,
+                 metrics=None):
+    results = queue.Queue()
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    def feed():
+        submitted = 0
+        try:
+            for key, pdf_path in items:
+                future = pool.submit(_extract_worker, pdf_path, max_pages, timeout)
+                future.add_done_callback(lambda f, key=key, path=pdf_path: results.put((key, path, f)))
+                submitted += 1
+        except Exception as e:
+            print(f"❌ 추출 대상 수집 실패: {e}")
+        finally:
+            results.put(submitted)
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    total, received = None, 0
+    try:
+        while total is None or received < total:
+            item = results.get()
+            if isinstance(item, int):
+                total = item
+                continue
+            received += 1
+            key, pdf_path, future = item
+            try:
+                text, error, pages, seconds = future.result()
+            except Exception as e:
+                text, error, pages, seconds = "", str(e), 0, 0.0
+            if error:
+                print(f"⚠️ PDF 추출 문제 ({pdf_path}): {error}")
+            if metrics is not None:
+                metrics.record("extract", seconds, errors=int(bool(error)), pages=pages, chars=len(text))
+            yield key, pdf_path, text
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
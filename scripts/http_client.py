@@ -0,0 +1,93 @@
+import os
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 재시도 대상 HTTP 상태 코드
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# 호스트별 최소 요청 간격을 보장 (여러 스레드가 공유)
+class HostRateLimiter:
+    def __init__(self, rate=1.0, per_host=None):
+        self.rate = rate
+        self.per_host = per_host or {}
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def interval(self, host):
+        rate = self.per_host.get(host, self.rate)
+        return 1.0 / rate if rate else 0.0
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval(host)
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _retry_after(res):
+    value = res.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# 커넥션 풀 + 호스트별 rate limit + 지수 백오프 재시도
+class HttpClient:
+    def __init__(self, rate=1.0, per_host=None, max_retries=3, backoff=1.0, pool_size=8, timeout=30):
+        self.limiter = HostRateLimiter(rate, per_host)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait(url)
+            delay = None
+            try:
+                res = self.session.get(url, **kwargs)
+                if res.status_code in RETRY_STATUS and attempt < self.max_retries:
+                    delay = _retry_after(res)
+                    res.close()
+                else:
+                    res.raise_for_status()
+                    return res
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            if delay is None:
+                delay = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+            print(f"🔁 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}s 후): {url}")
+            time.sleep(delay)
+
+    def download(self, url, path, chunk_size=1 << 16):
+        # 임시 파일에 스트리밍으로 쓴 뒤 rename → 중단돼도 깨진 파일이 남지 않음 (실패하면 임시 파일도 삭제)
+        tmp_path = path + ".part"
+        try:
+            with self.get(url, stream=True) as res:
+                with open(tmp_path, "wb") as f:
+                    for block in res.iter_content(chunk_size):
+                        f.write(block)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        return size
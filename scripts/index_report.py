@@ -0,0 +1,89 @@
+import os
+import time
+import argparse
+
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+
+from embedder import load_embedding
+from vector_index import build_faiss_index, set_search_params, load_index, split_heldout
+from testset import load_testset, TESTSET_PATH
+
+# 압축(fp16 / sq8 / pq)·근사(IVF-PQ / HNSW) 인덱스의 recall@k, 지연시간, 크기를 flat(정확) 인덱스와 비교
+#   python scripts/index_report.py --vector-dir vectordb --k 5 --heldout 200
+# 질의는 인덱스에 들어 있지 않은 벡터만 사용 (들어 있는 벡터로 질의하면 자기 자신이 항상 1등이라 recall이 부풀려짐)
+#   testset 질의 임베딩 + 코퍼스에서 떼어 낸 held-out 조각 (held-out은 비교하는 모든 인덱스에서 제외)
+
+SWEEPS = {
+    "flat": [None],
+    "fp16": [None],
+    "sq8": [None],
+    "pq": [None],
+    "ivfpq": [1, 4, 8, 16, 32, 64],  # nprobe
+    "hnsw": [16, 32, 64, 128, 256],  # efSearch
+}
+
+
+def load_vectors(vector_dir, embedding):
+    db = load_index(vector_dir, embedding)
+    texts = [text for _, text in db.iter_texts()]
+    # 임베딩 캐시에서 가져오므로 인덱스 생성 때 계산한 벡터를 그대로 재사용
+    return np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+
+def search_each(index, queries, k):
+    # 온라인 질의처럼 한 건씩 검색해서 지연시간 측정
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        _, found = index.search(q[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        ids.append(found[0])
+    return np.array(ids), np.array(latencies)
+
+def recall_at_k(found, truth):
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def query_vectors(embedding, testset_path):
+    queries = [case["query"] for case in load_testset(testset_path)]
+    return np.asarray([embedding.embed_query(q) for q in queries], dtype=np.float32)
+
+def run_report(vectors, queries, k, types):
+    exact, _ = build_faiss_index(vectors, "flat")
+    truth, _ = search_each(exact, queries, k)
+
+    print(f"\n📊 벡터 {len(vectors)}개 × {vectors.shape[1]}차원, 질의 {len(queries)}개, k={k}")
+    print(f"{'type':<8} {'param':>7} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'size MB':>8} {'B/vec':>7} {'build s':>8}")
+    for index_type in types:
+        start = time.perf_counter()
+        index, built_type = build_faiss_index(vectors, index_type)
+        build_time = time.perf_counter() - start
+        size = faiss.serialize_index(index).nbytes
+        for param in SWEEPS[built_type]:
+            if built_type == "ivfpq":
+                set_search_params(index, nprobe=param)
+            elif built_type == "hnsw":
+                set_search_params(index, ef_search=param)
+            found, latencies = search_each(index, queries, k)
+            print(f"{built_type:<8} {param if param is not None else '-':>7} {recall_at_k(found, truth):9.3f} "
+                  f"{np.percentile(latencies, 50) * 1000:8.3f} {np.percentile(latencies, 95) * 1000:8.3f} "
+                  f"{size / 1e6:8.1f} {size / len(vectors):7.0f} {build_time:8.2f}")
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="ANN 인덱스 recall / latency 리포트")
+    parser.add_argument("--vector-dir", default="vectordb")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL"))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--heldout", type=int, default=200, help="질의로 쓸 held-out 조각 수 (인덱스에서 제외)")
+    parser.add_argument("--testset", default=TESTSET_PATH, help="질의 임베딩에 쓸 테스트셋 (빈 문자열이면 사용 안 함)")
+    parser.add_argument("--types", nargs="+", default=list(SWEEPS), choices=list(SWEEPS))
+    args = parser.parse_args()
+
+    with load_embedding(args.model, verbose=False) as embedding:
+        vectors = load_vectors(args.vector_dir, embedding)
+        tests = query_vectors(embedding, args.testset) if args.testset else np.empty((0, vectors.shape[1]), np.float32)
+    vectors, heldout = split_heldout(vectors, args.heldout)
+    print(f"🔎 질의: testset {len(tests)}개 + held-out {len(heldout)}개")
+    run_report(vectors, np.concatenate([tests, heldout]), args.k, args.types)
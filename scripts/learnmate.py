@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+import subprocess
+from collections import defaultdict
+
+# Learnmate 통합 CLI
+#   python scripts/learnmate.py ingest                     # 수집 → 다운로드 → 추출 → 요약 → 임베딩 (cron)
+#   python scripts/learnmate.py embed --rebuild
+#   python scripts/learnmate.py serve --port 8000          # FastAPI 서버, --ui 이면 Streamlit 챗봇
+#   python scripts/learnmate.py eval --testset scripts/testset.jsonl
+#   python scripts/learnmate.py bench --concurrency 1 4 8
+#   python scripts/learnmate.py ingest --profile-imports   # 패키지별 import 시간 보고 (하위 명령 앞/뒤 어디든)
+# 선택된 하위 명령의 모듈만 import하고, 각 모듈도 torch / openai / pdfplumber 같은 무거운 라이브러리는
+# 그 단계가 실제로 실행될 때 import → --help나 새 논문이 없는 cron 실행은 torch를 로드하지 않음
+
+# 하위 명령 → (모듈, 설명), 모듈은 add_arguments(parser)(선택)와 main(args)를 제공
+COMMANDS = {
+    "ingest": ("pipeline", "논문 수집 → 다운로드 → 추출 → 요약 → 벡터 DB 반영"),
+    "embed": ("embed", "요약 .md 파일로 벡터 DB 생성/갱신"),
+    "serve": ("server", "비동기 질의 API 서버 (--ui: Streamlit 챗봇)"),
+    "eval": ("evaluation", "검색 / 답변 품질 평가"),
+    "bench": ("bench", "검색 / end-to-end 벤치마크"),
+}
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_TOP = 15
+# 보고서에서 표시할 무거운 패키지 (이 목록에 있는데 import됐다면 해당 단계가 실행된 것)
+HEAVY_PACKAGES = {"torch", "sentence_transformers", "transformers", "faiss", "langchain", "langchain_core",
+                  "langchain_openai", "langchain_huggingface", "openai", "pdfplumber", "fastapi", "streamlit"}
+
+
+def selected_command(argv):
+    return next((arg for arg in argv if arg in COMMANDS), None)
+
+def add_profile_argument(parser, default=False):
+    parser.add_argument("--profile-imports", action="store_true", default=default,
+                        help="-X importtime으로 다시 실행해 패키지별 import 시간 보고")
+
+# 모든 하위 명령을 등록하되, 인자 정의를 위해 모듈을 import하는 것은 실행할 명령 하나뿐
+def build_parser(command=None):
+    parser = argparse.ArgumentParser(prog="learnmate", description="Learnmate 수집 / 서빙 / 평가 CLI")
+    add_profile_argument(parser)
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+    for name, (module_name, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        add_profile_argument(sub, default=argparse.SUPPRESS)  # 하위 명령 뒤에 써도 됨 (앞에 쓴 값을 덮지 않음)
+        if name == "serve":
+            sub.add_argument("--ui", action="store_true", help="API 서버 대신 Streamlit 챗봇 실행")
+        if name == command:
+            module = importlib.import_module(module_name)
+            if hasattr(module, "add_arguments"):
+                module.add_arguments(sub)
+    return parser
+
+
+def run_streamlit():
+    cmd = [sys.executable, "-m", "streamlit", "run", os.path.join(SCRIPTS_DIR, "chatbot.py")]
+    return subprocess.call(cmd)
+
+
+# python -X importtime 출력(stderr)을 top-level 패키지별 self 시간으로 합산
+#   "import time: self [us] | cumulative | imported package"
+def parse_importtime(lines):
+    packages = defaultdict(lambda: [0, 0])  # name → [self us, 모듈 수]
+    other = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 헤더 줄
+        name = fields[2].strip().split(".")[0]
+        packages[name][0] += int(fields[0])
+        packages[name][1] += 1
+    return dict(packages), other
+
+def print_import_report(packages, wall, top=PROFILE_TOP):
+    total = sum(us for us, _ in packages.values())
+    print(f"\n📦 import 시간: 전체 {total / 1e6:.2f}s / 실행 {wall:.2f}s, 모듈 {sum(n for _, n in packages.values())}개")
+    print(f"{'package':<24} {'self s':>8} {'share':>6} {'modules':>8}")
+    for name, (us, count) in sorted(packages.items(), key=lambda item: -item[1][0])[:top]:
+        mark = " *" if name in HEAVY_PACKAGES else ""
+        print(f"{name:<24} {us / 1e6:8.3f} {us / max(total, 1):6.1%} {count:8d}{mark}")
+    loaded = sorted(name for name in packages if name in HEAVY_PACKAGES)
+    print(f"무거운 패키지(*) 로드: {', '.join(loaded) if loaded else '없음'}")
+
+def profile_imports(argv):
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__),
+           *[arg for arg in argv if arg != "--profile-imports"]]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    packages, other = parse_importtime(proc.stderr.splitlines())
+    if other:
+        sys.stderr.write("\n".join(other) + "\n")
+    print_import_report(packages, wall)
+    return proc.returncode
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = selected_command(argv)
+    if "--profile-imports" in argv:
+        return profile_imports(argv)
+
+    args = build_parser(command).parse_args(argv)
+    if args.command == "serve" and args.ui:
+        return run_streamlit()
+    importlib.import_module(COMMANDS[args.command][0]).main(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
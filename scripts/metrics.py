@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+METRICS_LOG = os.getenv("METRICS_LOG", "logs/ingest_metrics.jsonl")
+STAGE_ORDER = ["crawl", "download", "extract", "dedup", "summarize", "chunk", "embed", "index_write"]
+
+
+# 수집 파이프라인의 단계별 시간 / 처리량 / 카운터를 JSON line으로 기록
+#   이벤트: {"event": "stage", "run": ..., "stage": ..., "seconds": ..., 카운터...}
+#   종료 시 {"event": "summary", ...} 한 줄 + 표 출력
+# 단계는 여러 스레드/프로세스에서 겹쳐 실행되므로 busy 시간(합계)과 wall 구간(처음 시작 ~ 마지막 끝)을 따로 집계
+class RunMetrics:
+    def __init__(self, path=METRICS_LOG, run_id=None, echo=False):
+        self.path = path
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self.echo = echo
+        self.started = time.time()
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _emit(self, record):
+        record = {"time": datetime.now().isoformat(timespec="seconds"), "run": self.run_id, **record}
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+        if self.echo:
+            print(line)
+
+    # 단계 하나(문서 하나, 페이지 하나 등)가 끝났을 때 호출: seconds는 busy 시간, counters는 누적
+    def record(self, stage, seconds, items=1, errors=0, end=None, emit=True, **counters):
+        end = end or time.time()
+        with self._lock:
+            stats = self.stages.setdefault(stage, {"items": 0, "errors": 0, "seconds": 0.0,
+                                                   "first_start": end - seconds, "last_end": end, "counters": {}})
+            stats["items"] += items
+            stats["errors"] += errors
+            stats["seconds"] += seconds
+            stats["first_start"] = min(stats["first_start"], end - seconds)
+            stats["last_end"] = max(stats["last_end"], end)
+            for key, value in counters.items():
+                if isinstance(value, (int, float)):
+                    stats["counters"][key] = stats["counters"].get(key, 0) + value
+        if emit:
+            self._emit({"event": "stage", "stage": stage, "seconds": round(seconds, 4), "items": items,
+                        "errors": errors, **counters})
+
+    # with metrics.stage("summarize", doc=title) as fields: ... fields["tokens_in"] = n
+    # 블록에서 예외가 나면 errors=1로 기록하고 예외는 그대로 전달
+    @contextmanager
+    def stage(self, name, items=1, **fields):
+        counters = dict(fields)
+        start = time.perf_counter()
+        errors = 0
+        try:
+            yield counters
+        except Exception:
+            errors = 1
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, items=counters.pop("items", items), errors=errors,
+                        **counters)
+
+    def add(self, stage, **counters):
+        with self._lock:
+            stats = self.stages.setdefault(stage, {"items": 0, "errors": 0, "seconds": 0.0,
+                                                   "first_start": time.time(), "last_end": time.time(),
+                                                   "counters": {}})
+            for key, value in counters.items():
+                stats["counters"][key] = stats["counters"].get(key, 0) + value
+
+    def summary(self):
+        wall = time.time() - self.started
+        stages = {}
+        names = [s for s in STAGE_ORDER if s in self.stages] + [s for s in self.stages if s not in STAGE_ORDER]
+        for name in names:
+            stats = self.stages[name]
+            span = max(stats["last_end"] - stats["first_start"], 0.0)
+            stages[name] = {
+                "items": stats["items"],
+                "errors": stats["errors"],
+                "busy_s": round(stats["seconds"], 3),
+                "span_s": round(span, 3),
+                "items_per_s": round(stats["items"] / stats["seconds"], 3) if stats["seconds"] else None,
+                **stats["counters"],
+            }
+        return {"wall_s": round(wall, 3), "stages": stages}
+
+    def close(self, **extra):
+        summary = self.summary()
+        self._emit({"event": "summary", **summary, **extra})
+        print_summary(summary)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        return summary
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close(failed=exc[0] is not None)
+
+
+def print_summary(summary):
+    print(f"\n📈 단계별 실행 통계 (전체 {summary['wall_s']:.1f}s)")
+    print(f"{'stage':<12} {'items':>6} {'err':>4} {'busy s':>9} {'span s':>9} {'items/s':>9}  counters")
+    for name, stats in summary["stages"].items():
+        counters = {k: v for k, v in stats.items()
+                    if k not in ("items", "errors", "busy_s", "span_s", "items_per_s")}
+        rate = f"{stats['items_per_s']:9.2f}" if stats["items_per_s"] is not None else f"{'-':>9}"
+        extra = " ".join(f"{k}={v:.0f}" if isinstance(v, float) else f"{k}={v}" for k, v in counters.items())
+        print(f"{name:<12} {stats['items']:>6} {stats['errors']:>4} {stats['busy_s']:9.2f} {stats['span_s']:9.2f} "
+              f"{rate}  {extra}")
+
+
+# metrics가 없을 때(다른 스크립트에서 재사용 등)도 같은 코드로 쓰기 위한 헬퍼
+def timed(metrics, name, **fields):
+    return metrics.stage(name, **fields) if metrics is not None else nullcontext({})
@@ -0,0 +1,127 @@
+import os
+import zlib
+import hashlib
+
+import numpy as np
+
+from sparse_index import tokenize
+
+# MinHash + LSH 유사 중복 탐지 (같은 논문의 다른 버전, 수집원이 달라 제목이 조금 다른 논문, 반복되는 문단 등)
+#   minhash     : key별 MinHash 서명 (uint64 × MINHASH_PERMS)
+#   lsh_buckets : 서명을 LSH_BANDS개 band로 나눈 hash → 같은 bucket에 들어간 key만 후보로 비교
+# 논문 단위(작업 큐, 요약 전)와 chunk 단위(docs.sqlite, 임베딩 전) 두 곳에서 같은 테이블 구조를 사용
+NEAR_DUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash (key TEXT PRIMARY KEY, signature BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lsh_buckets_key ON lsh_buckets (key);
+"""
+
+NEAR_DUP = os.getenv("NEAR_DUP", "1") != "0"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))  # 추정 Jaccard 유사도가 이 이상이면 중복
+SHINGLE_SIZE = 5  # 연속 토큰 5개를 shingle 하나로
+MINHASH_PERMS = 128
+LSH_BANDS = 32  # band당 4행 → 유사도 ~0.42부터 후보가 되고, 최종 판정은 서명 비교로
+HASH_BLOCK = 4096  # 긴 본문은 shingle을 나눠서 처리 (메모리: 블록 × MINHASH_PERMS × 8바이트)
+
+# (a·x + b) mod p, x는 crc32(32bit) → a < 2^31이면 uint64 안에서 넘치지 않음
+PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20240501)  # 서명을 저장해 두므로 실행마다 같은 순열이어야 함
+PERM_A = _rng.randint(1, 2 ** 31, size=MINHASH_PERMS, dtype=np.int64).astype(np.uint64)
+PERM_B = _rng.randint(0, 2 ** 31, size=MINHASH_PERMS, dtype=np.int64).astype(np.uint64)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+# 토큰이 없는 텍스트는 None
+def signature(text):
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles(text)), dtype=np.uint64)
+    if not len(hashes):
+        return None
+    result = np.full(MINHASH_PERMS, np.iinfo(np.uint64).max, dtype=np.uint64)
+    for start in range(0, len(hashes), HASH_BLOCK):
+        block = hashes[start:start + HASH_BLOCK]
+        permuted = (PERM_A[:, None] * block[None, :] + PERM_B[:, None]) % PRIME
+        np.minimum(result, permuted.min(axis=1), out=result)
+    return result
+
+def similarity(a, b):
+    return float(np.mean(a == b))
+
+def band_buckets(sig):
+    rows = MINHASH_PERMS // LSH_BANDS
+    return [
+        (band, int.from_bytes(hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(),
+                                              digest_size=8).digest(), "little", signed=True))
+        for band in range(LSH_BANDS)
+    ]
+
+
+def add(conn, key, sig):
+    if sig is None:
+        return
+    key = str(key)
+    conn.execute("INSERT OR REPLACE INTO minhash (key, signature) VALUES (?, ?)", (key, sig.tobytes()))
+    conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, key) VALUES (?, ?, ?)",
+                     [(band, bucket, key) for band, bucket in band_buckets(sig)])
+
+def remove(conn, keys):
+    keys = [str(key) for key in keys]
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM minhash WHERE key IN ({marks})", batch)
+        conn.execute(f"DELETE FROM lsh_buckets WHERE key IN ({marks})", batch)
+
+def clear(conn):
+    conn.execute("DELETE FROM minhash")
+    conn.execute("DELETE FROM lsh_buckets")
+
+# 가장 비슷한 기존 key와 유사도 (key, similarity), threshold 미만이면 None
+#   exclude: 자기 자신처럼 비교에서 뺄 key
+#   accept(candidate keys) -> 비교할 key 목록 (다른 namespace / 아직 비교 대상이 아닌 key 제외)
+def find(conn, sig, threshold=NEAR_DUP_THRESHOLD, exclude=None, accept=None):
+    if sig is None:
+        return None
+    buckets = band_buckets(sig)
+    condition = " OR ".join(["(band = ? AND bucket = ?)"] * len(buckets))
+    candidates = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT key FROM lsh_buckets WHERE {condition}", [v for pair in buckets for v in pair]
+    ) if row[0] != (str(exclude) if exclude is not None else None)]
+    if candidates and accept is not None:
+        candidates = list(accept(candidates))
+    if not candidates:
+        return None
+
+    best = None
+    for start in range(0, len(candidates), 500):
+        batch = candidates[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        for key, blob in conn.execute(f"SELECT key, signature FROM minhash WHERE key IN ({marks})", batch):
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint64))
+            if score >= threshold and (best is None or score > best[1]):
+                best = (key, score)
+    return best
+
+# 서명이 없는 chunk만 채움 (중복 탐지 도입 전에 만든 인덱스), 채운 개수 반환
+def backfill(conn):
+    rows = conn.execute(
+        "SELECT id, text FROM chunks WHERE CAST(id AS TEXT) NOT IN (SELECT key FROM minhash)"
+    ).fetchall()
+    added = 0
+    for chunk_id, text in rows:
+        sig = signature(text)
+        if sig is not None:
+            add(conn, chunk_id, sig)
+            added += 1
+    if added:
+        print(f"🧬 MinHash 서명 보충: {added}개 조각")
+    return added
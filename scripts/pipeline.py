@@ -1,35 +1,53 @@
 import os
-import time
-import requests
-import pdfplumber
-from openai import OpenAI
 from datetime import datetime
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from textwrap import TextWrapper
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# openai / langchain / faiss / pdfplumber / torch는 해당 단계에서 처음 필요할 때 import
+# → 새 논문이 없는 실행은 메타데이터 수집과 큐 확인만 하고 끝남
+from http_client import HttpClient
+from extract import extract_many
+from summary_cache import SummaryCache
+from summarizer import Summarizer, SUMMARY_MODEL
+from chunking import iter_chunks, token_counter
+from embedder import load_embedding
+from metrics import RunMetrics, timed
+from work_queue import WorkQueue
+from sources import build_sources, iter_all_papers, HOST_RATES, ERIC_PDF_URL
+from near_dup import NEAR_DUP
 
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+load_dotenv()
 
 # =========================
 # 설정
 # =========================
-BASE_URL = "https://eric.ed.gov"
-SEARCH_URL = "https://eric.ed.gov/?q=learning+strategy+OR+study+skill+OR+metacognition+of+student&ft=on&ff1=dtySince_2024"
-
 PDF_DIR = "data/papers"
 SUMMARY_DIR = "data/abstracts"
 VECTOR_STORE_DIR = "vectordb"
 TITLE_SLICE = 60
-CHUNK_SIZE = 5000  # Max chunk size in tokens
+CHUNK_SIZE = 5000  # Max chunk size in tokens (요약 모델 토크나이저 기준)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
+EMBED_CHUNK_SIZE = int(os.getenv("EMBED_CHUNK_SIZE", "400"))  # 임베딩 chunk 크기 (임베딩 모델 토크나이저 기준)
+EMBED_CHUNK_OVERLAP = int(os.getenv("EMBED_CHUNK_OVERLAP", "40"))
+
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))  # 동시 다운로드 수
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", "2"))  # 호스트별 초당 요청 수
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "20"))  # 요약 n편이 쌓일 때마다 인덱스에 반영
+# 본문 수집 방식
+#   auto: 초록이 ABSTRACT_MIN_CHARS 이상이거나 원문 PDF가 없으면 초록만 사용, 아니면 PDF 다운로드 → 추출 → 요약
+#   abstract: 항상 초록만 / pdf: 항상 PDF (없으면 건너뜀)
+#   초록만 쓰는 논문도 다운로드·추출만 건너뛰고 PDF 본문과 같은 요약기로 요약함 (원문 초록을 그대로 저장하지 않음)
+INGEST_MODE = os.getenv("INGEST_MODE", "auto")
+ABSTRACT_MIN_CHARS = int(os.getenv("ABSTRACT_MIN_CHARS", "600"))
 
 # =========================
 # 환경 설정
 # =========================
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+summarizer = None  # 요약할 논문이 생기면 get_summarizer()에서 생성
+http = HttpClient(rate=HOST_RATE_LIMIT, per_host=HOST_RATES, max_retries=FETCH_RETRIES, pool_size=FETCH_WORKERS)
 
 # =========================
 # 함수 정의
@@ -37,165 +55,319 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 def sanitize_filename(text):
     return "".join(c for c in text if c.isalnum() or c in " ._-").rstrip()
 
-def fetch_paper_links(max_pages=10):
-    print(f"🔍 ERIC 논문 목록 가져오는 중...")
-    paper_links = []
-    page_num = 0
-    next_url = SEARCH_URL
-
-    while next_url and page_num < max_pages:
-        page_num += 1
-        print(f"📄 페이지 {page_num} 요청 중: {next_url}")
-        try:
-            res = requests.get(next_url)
-            res.raise_for_status()
-        except Exception as e:
-            print(f"⚠️ 요청 실패 (페이지 {page_num}): {e}")
-            break
-
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        entries = soup.select(".r_i")
-        links = [urljoin(BASE_URL, entry.select_one("a")["href"]) for entry in entries if entry.select_one("a")]
-        paper_links.extend(links)
-
-        next_button = soup.find("a", string="Next Page »")
-        if next_button and next_button.get("href"):
-            next_url = urljoin(BASE_URL, next_button["href"])
-        else:
-            next_url = None
-
-        time.sleep(1)
-
-    print(f"📚 총 {len(paper_links)}편 논문 수집 완료 (최대 {max_pages}페이지 기준)")
-    return paper_links
-
-
+def summary_path(title):
+    return os.path.join(SUMMARY_DIR, sanitize_filename(title[:TITLE_SLICE]) + ".md")
 
-def download_pdf(paper_url):
-    eric_id = paper_url.split("id=")[-1]
-    title = eric_id
-    pdf_url = f"http://files.eric.ed.gov/fulltext/{eric_id}.pdf"
-    filename = sanitize_filename(title[:TITLE_SLICE]) + ".pdf"
-    path = os.path.join(PDF_DIR, filename)
+def download_pdf(paper, pdf_url, metrics=None):
+    path = os.path.join(PDF_DIR, sanitize_filename(paper[:TITLE_SLICE]) + ".pdf")
 
     if not os.path.exists(path):
-        print(f"⬇️ 다운로드 중: {eric_id}")
+        print(f"⬇️ 다운로드 중: {paper}")
         try:
-            pdf_res = requests.get(pdf_url)
-            pdf_res.raise_for_status()
-            with open(path, "wb") as f:
-                f.write(pdf_res.content)
+            with timed(metrics, "download") as fields:
+                fields["bytes"] = http.download(pdf_url, path)
             print(f"✅ 저장 완료: {path}")
-            return eric_id, path
+            return paper, path
         except Exception as e:
-            print(f"❌ PDF 다운로드 실패 ({eric_id}): {e}")
-            return None, None
+            print(f"❌ PDF 다운로드 실패 ({paper}): {e}")
+            return paper, None
     else:
         print(f"📦 이미 존재함: {path}")
-        return eric_id, path
+        if metrics is not None:
+            metrics.add("download", existing=1)
+        return paper, path
+
+def download_pdfs(items, workers=FETCH_WORKERS, metrics=None, window=None):
+    # items: (paper, pdf_url), generator여도 별도 스레드가 계속 제출하므로 크롤링과 다운로드가 겹쳐서 진행됨
+    # 끝난 다운로드는 크롤링 진행과 상관없이 바로 내보냄 → 추출이 첫 PDF부터 시작
+    # 제출했지만 아직 내보내지 않은 다운로드는 최대 window개 (기본 workers × 2), 꽉 차면 하나를 내보낼 때까지 제출 대기
+    window = window or workers * 2
+    results = queue.Queue()
+    slots = threading.Semaphore(window)
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+
+    def feed():
+        submitted, error = 0, None
+        try:
+            for paper, pdf_url in items:
+                slots.acquire()
+                if stop.is_set():
+                    break
+                pool.submit(download_pdf, paper, pdf_url, metrics).add_done_callback(results.put)
+                submitted += 1
+        except Exception as e:
+            error = e
+        finally:
+            results.put((submitted, error))
 
-def extract_text_from_pdf(pdf_path):
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+
+    total, received = None, 0
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            return "".join(page.extract_text() or "" for page in pdf.pages).strip()
-    except Exception as e:
-        print(f"❌ PDF 로딩 실패: {e}")
-        return ""
+        while total is None or received < total:
+            item = results.get()
+            if isinstance(item, tuple):
+                total, error = item
+                continue
+            received += 1
+            slots.release()
+            yield item.result()
+        if error is not None:
+            raise error
+    finally:
+        stop.set()
+        slots.release()  # 자리를 기다리던 feeder를 깨워서 종료시킴
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def get_summarizer():
+    global summarizer
+    if summarizer is None:
+        from openai import OpenAI
+        summarizer = Summarizer(
+            OpenAI(api_key=os.getenv("OPENAI_API_KEY")),
+            system_prompt="너는 교육 관련 논문을 요약하는 한국어 전문가야. 핵심 내용을 요약해줘.",
+            map_prompt="다음 논문을 10000단어 내외로 요약:\n{text}",
+            reduce_prompt="다음은 한 논문을 부분별로 요약한 내용이야. 중복을 정리해서 하나의 요약으로 합쳐줘:\n{text}",
+            cache=SummaryCache(),
+            max_tokens=1000,
+            temperature=0.3,
+        )
+    return summarizer
 
 def chunk_text(text, max_tokens=CHUNK_SIZE):
-    # Estimate token count by considering a rough average of 4 characters per token
-    max_chars = max_tokens * 4  # approximate
-    wrapper = TextWrapper(width=max_chars, break_long_words=False)
-    return wrapper.wrap(text)
-
-def summarize_text(text):
-    try:
-        # Split text into smaller chunks based on token length
-        chunks = chunk_text(text)
-        summaries = []
-        
-        for chunk in chunks:
-            # Check token length for each chunk to avoid exceeding the limit
-            response = client.chat.completions.create(
-                model="gpt-4.1",
-                messages=[
-                    {"role": "system", "content": "너는 교육 관련 논문을 요약하는 한국어 전문가야. 핵심 내용을 요약해줘."},
-                    {"role": "user", "content": f"다음 논문을 10000단어 내외로 요약:\n{chunk}"}
-                ],
-                max_tokens=1000,
-                temperature=0.3
-            )
-            summaries.append(response.choices[0].message.content.strip())
-        
-        return " ".join(summaries)  # Combine all summaries from chunks
-    except Exception as e:
-        print(f"❌ 요약 실패: {e}")
-        return ""
+    return iter_chunks(text, max_tokens, token_counter(SUMMARY_MODEL))
+
+def summarize_text(text, metrics=None):
+    # chunk별 요약은 병렬로, 부분 요약이 여러 개면 reduce 단계에서 하나로 합침
+    summarizer = get_summarizer()
+    before = (summarizer.calls, summarizer.tokens_in, summarizer.tokens_out,
+              summarizer.cache.hits, summarizer.cache.misses)
+    with timed(metrics, "summarize", chars=len(text)) as fields:
+        try:
+            return summarizer.summarize(chunk_text(text))
+        finally:
+            after = (summarizer.calls, summarizer.tokens_in, summarizer.tokens_out,
+                     summarizer.cache.hits, summarizer.cache.misses)
+            for key, b, a in zip(("llm_calls", "tokens_in", "tokens_out", "cache_hits", "cache_misses"), before, after):
+                fields[key] = a - b
 
 def save_summary_to_md(title, summary):
-    filename = sanitize_filename(title[:TITLE_SLICE]) + ".md"
-    path = os.path.join(SUMMARY_DIR, filename)
+    path = summary_path(title)
     with open(path, "w", encoding="utf-8") as f:
         f.write(f"# {title}\n\n{summary}\n")
     print(f"✅ 요약 저장 완료: {path}")
     return path
 
+# save_summary_to_md가 붙인 제목 줄을 떼고 요약 본문만 반환 (인덱스의 content hash와 같은 기준)
+def load_summary(md_path):
+    with open(md_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    _, _, body = content.partition("\n\n")
+    return body[:-1] if body.endswith("\n") else body
+
+def use_abstract(paper, mode=INGEST_MODE):
+    if not paper.abstract:
+        return False
+    if mode == "abstract":
+        return True
+    if mode == "pdf":
+        return False
+    return not paper.pdf_url or len(paper.abstract) >= ABSTRACT_MIN_CHARS
+
+# 본문(추출 텍스트 또는 초록)이 먼저 들어온 논문과 거의 같으면 원본 id → 요약·임베딩 없이 duplicate로
+#   kind: "abstract"(초록) / "text"(추출한 본문), 같은 종류끼리만 비교
+def near_duplicate_of(paper, text, queue, metrics=None, kind="text"):
+    if not NEAR_DUP:
+        return None
+    with timed(metrics, "dedup") as fields:
+        match = queue.check_near_duplicate(paper, text, kind)
+        fields["duplicates"] = int(match is not None)
+    if match is None:
+        return None
+    original, score = match
+    print(f"♊ 유사 중복 논문 건너뜀: {paper} ≈ {original} (유사도 {score:.2f})")
+    return original
+
+# 수집원에서 받은 논문을 큐에 등록하면서 PDF를 받아야 하는 논문만 (paper, pdf_url)로 흘려보냄
+#   이전 실행에서 못 받은 논문 먼저, DOI / 제목 hash가 같은 논문은 수집원이 달라도 한 번만
+#   초록으로 충분하면 다운로드·추출 없이 초록을 본문으로 extracted에 등록 (요약은 ingest에서)
+def papers_to_download(papers, queue, metrics=None):
+    for item in queue.items("discovered"):
+        yield item["id"], item["pdf_url"] or ERIC_PDF_URL.format(eric_id=item["id"])
+
+    duplicates = 0
+    for paper in papers:
+        known = queue.find_duplicate(paper.doi, paper.title_hash) or (paper.key if queue.get(paper.key) else None)
+        if known is not None:
+            if known != paper.key:
+                duplicates += 1
+                print(f"♊ 중복 논문 건너뜀: {paper.key} = {known}")
+            continue
+
+        md_path = summary_path(paper.key)
+        if os.path.exists(md_path):
+            # 큐 도입 전에 요약된 논문: 인덱스에 이미 있는지는 update_index가 content hash로 판단
+            if queue.discover(paper.key, state="summarized", md_path=md_path, **paper.queue_fields()):
+                print(f"⏩ 이미 요약됨: {md_path}")
+            continue
+
+        if use_abstract(paper):
+            queue.discover(paper.key, state="extracted", text=f"{paper.title}\n\n{paper.abstract}",
+                           **paper.queue_fields())
+            if metrics is not None:
+                metrics.add("crawl", abstract_only=1)
+            continue
+        if not paper.pdf_url:
+            continue
+        if queue.discover(paper.key, **paper.queue_fields()):
+            yield paper.key, paper.pdf_url
+
+    print(f"♊ 중복 제거: {duplicates}편")
+    if metrics is not None:
+        metrics.add("crawl", duplicates=duplicates)
+
+# 다운로드 결과를 큐에 기록하면서 추출할 PDF를 흘려보냄 (이전 실행에서 받아 둔 PDF 먼저)
+def pdfs_to_extract(downloads, queue):
+    for item in queue.items("downloaded"):
+        if item["pdf_path"] and os.path.exists(item["pdf_path"]):
+            yield item["id"], item["pdf_path"]
+        else:
+            queue.advance(item["id"], "discovered")  # PDF가 없어졌으면 다음 실행에서 다시 다운로드
+    for paper, pdf_path in downloads:
+        if not pdf_path:
+            queue.record_error(paper, "다운로드 실패")
+            continue
+        queue.advance(paper, "downloaded", pdf_path=pdf_path)
+        yield paper, pdf_path
+
+def summarize_paper(paper, text, queue, metrics=None):
+    try:
+        summary = summarize_text(text, metrics)
+    except Exception as e:
+        print(f"❌ 요약 실패 ({paper}): {e}")
+        queue.record_error(paper, e)
+        return
+    if not summary:
+        queue.record_error(paper, "빈 요약")
+        return
+    md_path = save_summary_to_md(paper, summary)
+    queue.advance(paper, "summarized", md_path=md_path, text=None)
+
+# 초록만 쓰는 논문: 먼저 요약된 초록과 거의 같으면 요약 없이 duplicate, 아니면 PDF 본문과 같은 요약기로 요약
+def summarize_abstract(paper, abstract, queue, metrics=None):
+    original = near_duplicate_of(paper, abstract, queue, metrics, kind="abstract")
+    if original is not None:
+        queue.advance(paper, "duplicate", duplicate_of=original, text=None)
+        return
+    summarize_paper(paper, abstract, queue, metrics)
+
+# extracted 상태인 논문 요약 (pdf_path가 없으면 초록만 쓰는 논문), 요약 n편이 쌓일 때마다 인덱스에 반영
+def summarize_extracted(queue, embedding, metrics=None, abstracts_only=False):
+    for item in queue.items("extracted"):
+        if abstracts_only and item["pdf_path"]:
+            continue
+        text = queue.get(item["id"])["text"]
+        if item["pdf_path"]:
+            summarize_paper(item["id"], text, queue, metrics)
+        else:
+            summarize_abstract(item["id"], text, queue, metrics)
+        if queue.count("summarized") >= INGEST_BATCH_SIZE:
+            embed_summarized(queue, embedding, metrics)
+
+# summarized 상태인 논문을 한 번에 인덱스에 반영하고 embedded로 표시
+# (반영 후 표시 전에 죽어도 다음 실행에서 content hash가 같아 다시 임베딩하지 않음)
+def embed_summarized(queue, embedding, metrics=None):
+    items = queue.items("summarized")
+    sources, done = {}, []
+    for item in items:
+        if item["md_path"] and os.path.exists(item["md_path"]):
+            sources[item["md_path"]] = load_summary(item["md_path"])
+            done.append(item["id"])
+        else:
+            queue.advance(item["id"], "discovered")  # 요약 파일이 없어졌으면 처음부터 다시
+    if not sources:
+        return
+
+    from vector_index import update_index
+
+    print(f"\n🧠 요약 {len(sources)}편을 벡터 DB에 반영하는 중...")
+    db = update_index(VECTOR_STORE_DIR, embedding, sources, split_summary, model_name=EMBEDDING_MODEL,
+                      metrics=metrics)
+    if db is not None:
+        db.close()
+    queue.advance_many(done, "embedded")
+    print(f"✅ 벡터 DB 저장 완료: {VECTOR_STORE_DIR}")
+
+def split_summary(source, summary):
+    from langchain.docstore.document import Document
+    return [
+        Document(page_content=chunk, metadata={"source": source, "chunk_idx": idx})
+        for idx, chunk in enumerate(
+            iter_chunks(summary, EMBED_CHUNK_SIZE, token_counter(EMBEDDING_MODEL), EMBED_CHUNK_OVERLAP)
+        )
+    ]
+
 def run_pipeline():
     os.makedirs(PDF_DIR, exist_ok=True)
     os.makedirs(SUMMARY_DIR, exist_ok=True)
 
-    links = fetch_paper_links(max_pages=10)
-    all_docs = []
-
-    for link in links:
-        try:
-            title, pdf_path = download_pdf(link)
-            if not pdf_path:
-                continue
-
-            # 요약 .md 파일이 이미 존재하면 스킵
-            md_filename = sanitize_filename(title[:TITLE_SLICE]) + ".md"
-            md_path = os.path.join(SUMMARY_DIR, md_filename)
-            if os.path.exists(md_path):
-                print(f"⏩ 이미 요약됨: {md_path}")
-                continue
+    # 임베딩 모델은 실제로 임베딩할 문서가 있을 때 처음 로드됨
+    with RunMetrics() as metrics, WorkQueue() as queue, load_embedding(EMBEDDING_MODEL) as embedding:
+        ingest(metrics, queue, embedding)
+        print(f"📋 작업 큐: {queue.counts()}")
+
+def ingest(metrics, queue, embedding):
+    # 1) 이전 실행에서 추출까지 끝나고 멈춘 논문부터 요약
+    summarize_extracted(queue, embedding, metrics)
+
+    # 2) 메타데이터 수집 → 다운로드 → 추출이 겹쳐서 진행, 추출된 순서대로 요약 (초록만 쓰는 논문은 extracted로 등록만)
+    papers = iter_all_papers(build_sources(http), metrics)
+    downloads = download_pdfs(papers_to_download(papers, queue, metrics), metrics=metrics)
+    for paper, pdf_path, text in extract_many(pdfs_to_extract(downloads, queue), metrics=metrics):
+        if not text:
+            print(f"⏩ 텍스트 없음: {paper}")
+            if queue.record_error(paper, "텍스트 없음"):
+                os.remove(pdf_path)
+            continue
 
-            text = extract_text_from_pdf(pdf_path)
+        original = near_duplicate_of(paper, text, queue, metrics)
+        if original is not None:
+            queue.advance(paper, "duplicate", duplicate_of=original)
             os.remove(pdf_path)
-            print(f"🗑 PDF 삭제 완료: {pdf_path}")
+            continue
 
-            if not text:
-                print(f"⏩ 텍스트 없음: {title}")
-                continue
+        # 본문을 큐에 저장한 뒤에 PDF 삭제 → 이후 단계에서 죽어도 다시 다운로드하지 않음
+        queue.advance(paper, "extracted", text=text)
+        os.remove(pdf_path)
+        print(f"🗑 PDF 삭제 완료: {pdf_path}")
 
-            summary = summarize_text(text)
-            if not summary:
-                continue
+        summarize_paper(paper, text, queue, metrics)
+        if queue.count("summarized") >= INGEST_BATCH_SIZE:
+            embed_summarized(queue, embedding, metrics)
 
-            save_summary_to_md(title, summary)
-            chunks = chunk_text(summary)
+    # 3) 수집하면서 등록한 초록만 쓰는 논문 요약
+    summarize_extracted(queue, embedding, metrics, abstracts_only=True)
 
-            for idx, chunk in enumerate(chunks):
-                doc = Document(page_content=chunk, metadata={"source": md_path, "chunk_idx": idx})
-                all_docs.append(doc)
+    # 4) 남은 요약을 인덱스에 반영
+    embed_summarized(queue, embedding, metrics)
 
-            time.sleep(2)
+    dedup = metrics.summary()["stages"].get("dedup", {}) if metrics is not None else {}
+    print(f"♊ 유사 중복 제거: 논문 {dedup.get('duplicates', 0)}편 / 조각 {dedup.get('chunk_duplicates', 0)}개")
 
-        except Exception as e:
-            print(f"❌ 처리 실패: {e}")
-            continue
+    if summarizer is None:
+        print("💾 요약할 논문 없음 (API 호출 0회)")
+        return
+    cache = summarizer.cache
+    print(f"💾 요약 캐시: hit {cache.hits}건 / miss {cache.misses}건 | API 호출 {summarizer.calls}회 "
+          f"(입력 {summarizer.tokens_in} / 출력 {summarizer.tokens_out} 토큰)")
 
-    if all_docs:
-        print("\n🧠 모든 요약을 벡터화 중...")
-        embedding = HuggingFaceEmbeddings(model_name=os.getenv("EMBEDDING_MODEL"))
-        db = FAISS.from_documents(all_docs, embedding)
-        db.save_local(VECTOR_STORE_DIR)
-        print(f"✅ 벡터 DB 저장 완료: {VECTOR_STORE_DIR}")
-    else:
-        print("📭 벡터화할 문서가 없습니다.")
+# learnmate ingest
+def main(args=None):
+    print(f"\n⏱ 실행 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    run_pipeline()
 
 # 실행
 if __name__ == "__main__":
-    print(f"\n⏱ 실행 시각: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    run_pipeline()
+    main()
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+
+LATENCY_LOG = os.getenv("LATENCY_LOG", "logs/chatbot_latency.jsonl")
+
+# 시스템 프롬프트 설정
+system_prompt = (
+    "your persona: 중고등학생의 학업 고민을 들어주는 따뜻하고 전략적인 대학생 멘토"
+    "선배가 후배에게 조언하듯 friendly and gentle mood를 유지, 친근한 반말로 답변"
+    "먼저 질문자의 상황에 공감하고, 이어서 [전략 → 실천] 구조로 답변할 것"
+    "답변의 학술적 근거는 /Users/jeong/AI/learnmate/data/abstracts 내의 데이터에 기반할 것"
+)
+
+# 답변을 만들 때 처음 생성 (검색만 하는 bench 등은 langchain을 import하지 않음)
+@lru_cache(maxsize=None)
+def get_prompt():
+    from langchain.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", "질문: {question}\n\n📎 참고 문서:\n{context}")
+    ])
+
+
+# RetrievalQA "stuff" 체인과 같은 방식으로 문서를 이어 붙임
+def format_context(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+def build_messages(question, docs):
+    return get_prompt().format_messages(question=question, context=format_context(docs))
+
+def source_titles(docs):
+    titles = []
+    for doc in docs:
+        title = os.path.splitext(os.path.basename(doc.metadata.get("source", "")))[0]
+        if title and title not in titles:
+            titles.append(title)
+    return titles
+
+
+# 요청 하나의 지연시간 기록: 검색 → 첫 토큰(TTFT) → 전체
+class RequestTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.retrieval = None
+        self.rerank = None
+        self.first_token = None
+        self.total = None
+
+    def mark_retrieval(self):
+        self.retrieval = time.perf_counter() - self.start
+
+    def mark_rerank(self):
+        self.rerank = time.perf_counter() - self.start - (self.retrieval or 0)
+
+    def mark_token(self):
+        if self.first_token is None:
+            self.first_token = time.perf_counter() - self.start
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+
+    def as_dict(self):
+        return {"retrieval_s": self.retrieval, "rerank_s": self.rerank, "ttft_s": self.first_token,
+                "total_s": self.total}
+
+
+# 검색(+ 선택적 rerank): reranker가 있으면 후보를 넓게 가져와 상위 k개만 남김
+def retrieve(db, question, k, vector=None, reranker=None, timer=None):
+    if reranker is None:
+        docs = [doc for doc, _ in db.search(question, k, vector=vector)]
+        if timer is not None:
+            timer.mark_retrieval()
+        return docs
+    candidates = [doc for doc, _ in db.search(question, max(k, reranker.candidates), vector=vector)]
+    if timer is not None:
+        timer.mark_retrieval()
+    docs = [doc for doc, _ in reranker.rerank(question, candidates, k)]
+    if timer is not None:
+        timer.mark_rerank()
+    return docs
+
+
+# 토큰이 도착하는 대로 문자열 조각을 내보냄 (st.write_stream 등에 그대로 전달)
+def stream_answer(llm, question, docs, timer=None):
+    for chunk in llm.stream(build_messages(question, docs)):
+        if chunk.content:
+            if timer is not None:
+                timer.mark_token()
+            yield chunk.content
+    if timer is not None:
+        timer.finish()
+
+def log_latency(question, timer, **extra):
+    record = {"time": datetime.now().isoformat(timespec="seconds"), "question_chars": len(question)}
+    record.update(timer.as_dict())
+    record.update(extra)
+    try:
+        if os.path.dirname(LATENCY_LOG):
+            os.makedirs(os.path.dirname(LATENCY_LOG), exist_ok=True)
+        with open(LATENCY_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ 지연시간 기록 실패: {e}")
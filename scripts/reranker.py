@@ -0,0 +1,92 @@
+import os
+import time
+import threading
+
+# 선택적 rerank 단계: 검색 후보를 넓게(RERANK_CANDIDATES) 가져와 cross-encoder로 (질문, 조각) 쌍을 한 번에 채점,
+# 상위 RERANK_TOP_N개만 프롬프트에 넣음 → 프롬프트 토큰·LLM 지연 감소, precision 향상
+#   RERANK_MODEL을 비워 두면 rerank 없이 기존 검색 결과 사용
+RERANK_MODEL = os.getenv("RERANK_MODEL", "")  # 예: cross-encoder/mmarco-mMiniLMv2-L12-H384-v1 (다국어)
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "2"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))  # 이 시간 안에 끝나도록 채점할 후보 수를 줄임
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "32"))
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))  # (질문 + 조각) 최대 토큰 수
+EMA_WEIGHT = 0.3
+
+
+class CrossEncoderReranker:
+    def __init__(self, model_name=RERANK_MODEL, top_n=RERANK_TOP_N, candidates=RERANK_CANDIDATES,
+                 budget_ms=RERANK_BUDGET_MS, batch_size=RERANK_BATCH_SIZE, max_length=RERANK_MAX_LENGTH,
+                 device="cpu"):
+        self.model_name = model_name
+        self.top_n = top_n
+        self.candidates = max(candidates, top_n)
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.device = device
+        self.pair_ms = None  # 쌍 하나당 채점 시간 추정치(ms), 예산 안에서 채점할 후보 수 계산에 사용
+        self.last_ms = 0.0
+        self.calls = 0
+        self.total_ms = 0.0
+        self.over_budget = 0
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name, max_length=self.max_length, device=self.device)
+        return self._model
+
+    # 첫 호출은 초기화 비용이 섞이므로 버리고, 실제 요청 크기(후보 수 × 최대 길이)로 한 번 더 채점한 시간을
+    # pair_ms 초기값으로 사용 → 첫 요청부터 예산에 맞춰 후보 수를 줄임
+    def warm_up(self):
+        self.model.predict([("warm-up", "warm-up")], show_progress_bar=False)
+        pairs = [("warm-up " * 16, "warm-up " * self.max_length)] * self.candidates
+        start = time.perf_counter()
+        self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        with self._lock:
+            self.pair_ms = (time.perf_counter() - start) * 1000 / len(pairs)
+
+    # 검색 순서대로 앞에서부터 예산 안에서 채점 가능한 만큼만 채점, [(doc, score)] 상위 top_n개
+    def rerank(self, query, docs, top_n=None):
+        top_n = top_n or self.top_n
+        if len(docs) <= 1:
+            return [(doc, 0.0) for doc in docs]
+        limit = len(docs)
+        if self.pair_ms:
+            limit = min(limit, max(top_n, int(self.budget_ms / self.pair_ms)))
+        scored = docs[:limit]
+
+        with self._lock:
+            start = time.perf_counter()
+            scores = self.model.predict([(query, doc.page_content) for doc in scored],
+                                        batch_size=self.batch_size, show_progress_bar=False)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            per_pair = elapsed / len(scored)
+            self.pair_ms = per_pair if self.pair_ms is None else (1 - EMA_WEIGHT) * self.pair_ms + EMA_WEIGHT * per_pair
+            self.last_ms = elapsed
+            self.calls += 1
+            self.total_ms += elapsed
+            if elapsed > self.budget_ms:
+                self.over_budget += 1
+
+        ranked = sorted(zip(scored, (float(s) for s in scores)), key=lambda item: -item[1])
+        return ranked[:top_n]
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "calls": self.calls,
+            "last_ms": self.last_ms,
+            "avg_ms": self.total_ms / self.calls if self.calls else 0.0,
+            "pair_ms": self.pair_ms,
+            "over_budget": self.over_budget,
+        }
+
+
+def load_reranker(model_name=RERANK_MODEL, **kwargs):
+    return CrossEncoderReranker(model_name, **kwargs) if model_name else None
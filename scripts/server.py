@@ -0,0 +1,251 @@
+import os
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+from vector_index import SharedIndex
+from rag import RequestTimer, retrieve, build_messages, source_titles, log_latency
+from answer_cache import SemanticAnswerCache
+from reranker import load_reranker
+
+# Streamlit 없이 여러 사용자의 질문을 한 프로세스에서 동시에 처리하는 비동기 HTTP API
+#   uvicorn 실행: python scripts/server.py --port 8000
+#   LLM 없이 부하 테스트: SERVE_LLM=stub python scripts/server.py
+
+load_dotenv()
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+VECTOR_DIR = os.getenv("VECTOR_DIR", "vectordb")
+SERVE_TOP_K = int(os.getenv("SERVE_TOP_K", "2"))
+SERVE_MAX_K = int(os.getenv("SERVE_MAX_K", "20"))  # 요청 한 번에 가져올 수 있는 최대 문서 수
+SERVE_LLM = os.getenv("SERVE_LLM", "openai")  # "stub"이면 OpenAI 호출 없이 고정 답변
+SERVE_STUB_DELAY = float(os.getenv("SERVE_STUB_DELAY", "0.5"))  # stub LLM 응답 지연(초)
+SERVE_MAX_CONCURRENT_LLM = int(os.getenv("SERVE_MAX_CONCURRENT_LLM", "8"))  # 동시에 보내는 LLM 요청 수
+SERVE_MAX_QUEUE = int(os.getenv("SERVE_MAX_QUEUE", "64"))  # 처리 중 + 대기 요청이 이 값을 넘으면 503
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "10"))  # 질의 임베딩을 모으는 시간
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+
+
+class AskRequest(BaseModel):
+    question: str
+    k: int = Field(SERVE_TOP_K, ge=1, le=SERVE_MAX_K)
+
+
+# 테스트용 LLM: OpenAI 대신 일정 시간 기다린 뒤 참고 문서 개수만 알려 줌
+class StubMessage:
+    def __init__(self, content):
+        self.content = content
+
+class StubLLM:
+    def __init__(self, delay=SERVE_STUB_DELAY):
+        self.delay = delay
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        return StubMessage(f"(stub) {len(messages)}개 메시지에 대한 답변")
+
+
+# 동시에 들어온 질문들을 잠깐(window) 모아서 embed_documents 한 번(forward pass 한 번)으로 임베딩
+class QueryEmbedBatcher:
+    def __init__(self, embedding, window_ms=EMBED_BATCH_WINDOW_MS, max_batch=EMBED_MAX_BATCH):
+        self.embedding = embedding
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def embed(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                # 모델 forward는 이벤트 루프를 막지 않도록 스레드에서 실행
+                vectors = await asyncio.to_thread(self.embedding.embed_documents, [text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+# 인덱스·임베딩 모델·LLM 클라이언트를 모든 요청이 공유
+class LearnmateService:
+    def __init__(self, embedding, llm, vector_dir=VECTOR_DIR, max_concurrent_llm=SERVE_MAX_CONCURRENT_LLM,
+                 max_queue=SERVE_MAX_QUEUE, reranker=None):
+        self.embedding = embedding
+        self.llm = llm
+        self.reranker = reranker
+        self.vector_dir = vector_dir
+        self.max_queue = max_queue
+        self.batcher = QueryEmbedBatcher(embedding)
+        self.answer_cache = SemanticAnswerCache()
+        self.llm_slots = asyncio.Semaphore(max_concurrent_llm)
+        self.index = SharedIndex(vector_dir, embedding)
+        self.pending = 0
+        self.llm_in_flight = 0
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+
+    async def ask(self, question, k):
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="요청이 많아 잠시 후 다시 시도해 주세요.")
+        self.pending += 1
+        self.requests += 1
+        timer = RequestTimer()
+        db = None
+        try:
+            vector = await self.batcher.embed(question)
+            db, version = await asyncio.to_thread(self.index.acquire)
+
+            cached = self.answer_cache.lookup(vector, version)
+            if cached is not None:
+                timer.mark_retrieval()
+                timer.mark_token()
+                timer.finish()
+                log_latency(question, timer, sources=cached["sources"], cache_hit=True, api=True)
+                return {"answer": cached["answer"], "sources": cached["sources"], "cache_hit": True,
+                        "timings": timer.as_dict()}
+
+            docs = await asyncio.to_thread(retrieve, db, question, k, vector, self.reranker, timer)
+            titles = source_titles(docs)
+
+            # LLM 동시 호출 수 제한 (초과분은 semaphore에서 대기)
+            async with self.llm_slots:
+                self.llm_in_flight += 1
+                try:
+                    message = await self.llm.ainvoke(build_messages(question, docs))
+                finally:
+                    self.llm_in_flight -= 1
+            timer.mark_token()
+            timer.finish()
+
+            self.answer_cache.store(question, vector, message.content, titles, version)
+            log_latency(question, timer, sources=titles, cache_hit=False, api=True)
+            return {"answer": message.content, "sources": titles, "cache_hit": False, "timings": timer.as_dict()}
+        except HTTPException:
+            raise
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ 오류: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            if db is not None:
+                self.index.release(db)
+            self.pending -= 1
+
+    def metrics(self):
+        return {
+            "queue_depth": self.pending,
+            "llm_in_flight": self.llm_in_flight,
+            "llm_waiting": max(0, self.pending - self.llm_in_flight),
+            "embed_queue": self.batcher.queue.qsize(),
+            "embed_batches": self.batcher.batches,
+            "embed_avg_batch": self.batcher.items / self.batcher.batches if self.batcher.batches else 0.0,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "index_version": self.index.version,
+            "answer_cache": self.answer_cache.stats(),
+            "reranker": self.reranker.stats() if self.reranker is not None else None,
+        }
+
+
+def default_embedding():
+    from embedder import load_embedding
+    return load_embedding(os.getenv("EMBEDDING_MODEL"), verbose=False)
+
+def default_llm():
+    if SERVE_LLM == "stub":
+        return StubLLM()
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(temperature=0.2, model_name="gpt-4.1", openai_api_key=os.getenv("OPENAI_API_KEY"))
+
+
+# embedding / llm을 넘기면 그대로 사용 (테스트에서 stub 주입)
+def create_app(embedding=None, llm=None, vector_dir=VECTOR_DIR, reranker=None):
+    @asynccontextmanager
+    async def lifespan(app):
+        service = LearnmateService(embedding or default_embedding(), llm or default_llm(), vector_dir,
+                                   reranker=reranker or load_reranker())
+        await asyncio.to_thread(service.index.load)  # 첫 요청 전에 인덱스 로드
+        if service.reranker is not None:
+            await asyncio.to_thread(service.reranker.warm_up)
+        service.batcher.start()
+        app.state.service = service
+        yield
+        await service.batcher.stop()
+        service.index.close()
+
+    app = FastAPI(title="Learnmate", lifespan=lifespan)
+
+    @app.post("/ask")
+    async def ask(request: AskRequest):
+        return await app.state.service.ask(request.question, request.k)
+
+    @app.get("/metrics")
+    async def metrics():
+        return app.state.service.metrics()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "index_version": app.state.service.index.version}
+
+    return app
+
+
+def add_arguments(parser):
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+
+def main(args):
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Learnmate 비동기 질의 API 서버")
+    add_arguments(parser)
+    main(parser.parse_args())
@@ -0,0 +1,198 @@
+import os
+import re
+import abc
+import hashlib
+import xml.etree.ElementTree as ET
+
+from metrics import timed
+
+# 논문 메타데이터 수집원(source) 플러그인
+#   Source.iter_papers() 가 페이지 단위로 메타데이터를 받아 Paper를 흘려보냄
+#   새 수집원은 Source를 상속해 name / iter_papers만 구현하고 SOURCES에 등록
+INGEST_SOURCES = os.getenv("INGEST_SOURCES", "eric,arxiv")  # 쉼표로 구분
+
+ERIC_API_URL = os.getenv("ERIC_API_URL", "https://api.ies.ed.gov/eric/")
+ERIC_PDF_URL = os.getenv("ERIC_PDF_URL", "http://files.eric.ed.gov/fulltext/{eric_id}.pdf")
+ERIC_QUERY = os.getenv("ERIC_QUERY", '"learning strategies" OR "study skills" OR metacognition')
+ERIC_SINCE_YEAR = int(os.getenv("ERIC_SINCE_YEAR", "2024"))
+ERIC_MAX_RESULTS = int(os.getenv("ERIC_MAX_RESULTS", "500"))
+ERIC_PAGE_SIZE = 200
+
+ARXIV_API_URL = os.getenv("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_QUERY = os.getenv("ARXIV_QUERY", '(ti:"learning" OR abs:"learning") AND (ti:"students" OR abs:"students")')
+ARXIV_MAX_RESULTS = int(os.getenv("ARXIV_MAX_RESULTS", "500"))
+ARXIV_PAGE_SIZE = 100
+ARXIV_RATE = 1 / 3  # arXiv API 이용 규칙: 요청 간격 3초 이상
+
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom", "arxiv": "http://arxiv.org/schemas/atom"}
+
+
+def normalize_doi(doi):
+    if not doi:
+        return None
+    doi = doi.strip().lower()
+    doi = re.sub(r"^(https?://(dx\.)?doi\.org/|doi:)", "", doi)
+    return doi or None
+
+# ERIC API에는 DOI 필드가 없음 → 출판사 링크(url)가 doi.org 주소일 때만 DOI로 사용
+def doi_from_url(url):
+    if url and re.match(r"^https?://(dx\.)?doi\.org/10\.", url.strip(), re.IGNORECASE):
+        return normalize_doi(url)
+    return None
+
+# 대소문자·공백·문장부호를 무시한 제목 hash → 같은 논문이 여러 수집원에 있을 때 중복 판정
+def title_hash(title):
+    normalized = re.sub(r"[^0-9a-z가-힣]+", "", (title or "").lower())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16] if normalized else None
+
+
+class Paper:
+    def __init__(self, source, key, title, abstract=None, pdf_url=None, doi=None, year=None, url=None):
+        self.source = source
+        self.key = key  # 작업 큐 id / 요약 파일 이름 (수집원 간에 겹치지 않게)
+        self.title = " ".join((title or "").split())
+        self.abstract = " ".join((abstract or "").split())
+        self.pdf_url = pdf_url
+        self.doi = normalize_doi(doi)
+        self.year = year
+        self.url = url
+
+    @property
+    def title_hash(self):
+        return title_hash(self.title)
+
+    # 작업 큐에 함께 저장할 값
+    def queue_fields(self):
+        return {"source": self.source, "title": self.title, "doi": self.doi, "title_hash": self.title_hash,
+                "url": self.url, "pdf_url": self.pdf_url}
+
+
+class Source(abc.ABC):
+    name = None
+
+    def __init__(self, http):
+        self.http = http
+
+    @abc.abstractmethod
+    def iter_papers(self, metrics=None):
+        ...
+
+
+# ERIC 공개 API (JSON), start/rows로 페이지 이동
+class EricSource(Source):
+    name = "eric"
+
+    def __init__(self, http, query=ERIC_QUERY, since_year=ERIC_SINCE_YEAR, max_results=ERIC_MAX_RESULTS):
+        super().__init__(http)
+        self.query = query
+        self.since_year = since_year
+        self.max_results = max_results
+
+    def iter_papers(self, metrics=None):
+        print(f"🔍 ERIC 논문 목록 가져오는 중...")
+        search = f"({self.query}) AND publicationdateyear:[{self.since_year} TO *]"
+        start, total = 0, 0
+        while start < self.max_results:
+            params = {
+                "search": search, "format": "json", "start": start,
+                "rows": min(ERIC_PAGE_SIZE, self.max_results - start),
+                "fields": "id,title,description,publicationdateyear,e_fulltextauth,url",
+            }
+            try:
+                with timed(metrics, "crawl", source=self.name) as fields:
+                    res = self.http.get(ERIC_API_URL, params=params)
+                    docs = res.json().get("response", {}).get("docs", [])
+                    fields["links"] = len(docs)
+                    fields["bytes"] = len(res.content)
+            except Exception as e:
+                print(f"⚠️ ERIC 요청 실패 (start={start}): {e}")
+                break
+            if not docs:
+                break
+
+            for doc in docs:
+                year = doc.get("publicationdateyear")
+                if year and int(year) < self.since_year:
+                    continue
+                eric_id = doc["id"]
+                has_fulltext = str(doc.get("e_fulltextauth", "")) == "1"
+                total += 1
+                yield Paper(
+                    self.name, eric_id, doc.get("title"), abstract=doc.get("description"),
+                    pdf_url=ERIC_PDF_URL.format(eric_id=eric_id) if has_fulltext else None,
+                    doi=doi_from_url(doc.get("url")), year=year, url=doc.get("url") or f"https://eric.ed.gov/?id={eric_id}",
+                )
+            start += len(docs)
+        print(f"📚 ERIC {total}편 수집")
+
+
+# arXiv Atom API, start/max_results로 페이지 이동 (요청 간격은 HttpClient의 호스트별 rate limit이 보장)
+class ArxivSource(Source):
+    name = "arxiv"
+
+    def __init__(self, http, query=ARXIV_QUERY, max_results=ARXIV_MAX_RESULTS):
+        super().__init__(http)
+        self.query = query
+        self.max_results = max_results
+
+    def iter_papers(self, metrics=None):
+        print(f"📡 arXiv 논문 목록 가져오는 중...")
+        start, total = 0, 0
+        while start < self.max_results:
+            params = {
+                "search_query": self.query, "start": start,
+                "max_results": min(ARXIV_PAGE_SIZE, self.max_results - start),
+                "sortBy": "submittedDate", "sortOrder": "descending",
+            }
+            try:
+                with timed(metrics, "crawl", source=self.name) as fields:
+                    res = self.http.get(ARXIV_API_URL, params=params)
+                    entries = ET.fromstring(res.content).findall("atom:entry", ATOM_NS)
+                    fields["links"] = len(entries)
+                    fields["bytes"] = len(res.content)
+            except Exception as e:
+                print(f"⚠️ arXiv 요청 실패 (start={start}): {e}")
+                break
+            if not entries:
+                break
+
+            for entry in entries:
+                paper = self._parse(entry)
+                if paper is not None:
+                    total += 1
+                    yield paper
+            start += len(entries)
+        print(f"📚 arXiv {total}편 수집")
+
+    def _parse(self, entry):
+        abs_url = (entry.findtext("atom:id", "", ATOM_NS) or "").strip()
+        arxiv_id = re.sub(r"v\d+$", "", abs_url.rsplit("/abs/", 1)[-1])
+        if not arxiv_id:
+            return None
+        pdf_url = None
+        for link in entry.findall("atom:link", ATOM_NS):
+            if link.get("title") == "pdf":
+                pdf_url = link.get("href")
+        published = entry.findtext("atom:published", "", ATOM_NS)
+        return Paper(
+            self.name, "arxiv-" + arxiv_id.replace("/", "_"), entry.findtext("atom:title", "", ATOM_NS),
+            abstract=entry.findtext("atom:summary", "", ATOM_NS), pdf_url=pdf_url,
+            doi=entry.findtext("arxiv:doi", None, ATOM_NS), year=int(published[:4]) if published else None,
+            url=abs_url,
+        )
+
+
+SOURCES = {source.name: source for source in (EricSource, ArxivSource)}
+HOST_RATES = {"export.arxiv.org": ARXIV_RATE}  # HttpClient per_host로 전달
+
+
+def build_sources(http, names=INGEST_SOURCES):
+    names = [name.strip() for name in names.split(",") if name.strip()] if isinstance(names, str) else names
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise ValueError(f"알 수 없는 수집원: {', '.join(unknown)} (가능: {', '.join(SOURCES)})")
+    return [SOURCES[name](http) for name in names]
+
+def iter_all_papers(sources, metrics=None):
+    for source in sources:
+        yield from source.iter_papers(metrics)
@@ -0,0 +1,119 @@
+import os
+import re
+import math
+from collections import Counter, defaultdict
+
+# docs.sqlite 안의 BM25 역색인 (dense 검색이 놓치는 전략 이름 같은 키워드 정확 일치 보완)
+#   postings      : term → chunk_id, 출현 횟수(tf)
+#   chunk_lengths : chunk별 토큰 수 (BM25 길이 정규화)
+# 한국어는 형태소 분석기 없이 음절 bigram으로 색인 → "전략의", "전략을" 모두 "전략"과 일치
+SPARSE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    chunk_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_chunk ON postings (chunk_id);
+CREATE TABLE IF NOT EXISTS chunk_lengths (chunk_id INTEGER PRIMARY KEY, length INTEGER NOT NULL);
+"""
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SPARSE_MAX_DF = float(os.getenv("SPARSE_MAX_DF", "0.5"))  # 조각의 이 비율 이상에 나오는 term은 질의에서 제외
+
+TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if run[0].isascii():
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def index_chunk(conn, chunk_id, text):
+    tokens = tokenize(text)
+    conn.executemany(
+        "INSERT OR REPLACE INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)",
+        [(term, chunk_id, tf) for term, tf in Counter(tokens).items()],
+    )
+    conn.execute("INSERT OR REPLACE INTO chunk_lengths (chunk_id, length) VALUES (?, ?)", (chunk_id, len(tokens)))
+
+def remove_chunks(conn, chunk_ids):
+    for start in range(0, len(chunk_ids), 500):
+        batch = [int(i) for i in chunk_ids[start:start + 500]]
+        marks = ",".join("?" * len(batch))
+        conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({marks})", batch)
+        conn.execute(f"DELETE FROM chunk_lengths WHERE chunk_id IN ({marks})", batch)
+
+def clear(conn):
+    conn.execute("DELETE FROM postings")
+    conn.execute("DELETE FROM chunk_lengths")
+
+# 역색인이 생기기 전에 만든 인덱스: 아직 색인되지 않은 chunk만 채움, 채운 개수 반환
+def backfill(conn):
+    rows = conn.execute(
+        "SELECT id, text FROM chunks WHERE id NOT IN (SELECT chunk_id FROM chunk_lengths)"
+    ).fetchall()
+    for chunk_id, text in rows:
+        index_chunk(conn, chunk_id, text)
+    if rows:
+        print(f"🔤 BM25 역색인 보충: {len(rows)}개 조각")
+    return len(rows)
+
+def has_sparse(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunk_lengths'").fetchone() is not None
+
+def corpus_stats(conn):
+    count, avg_length = conn.execute("SELECT COUNT(*), AVG(length) FROM chunk_lengths").fetchone()
+    return count, avg_length or 1.0
+
+
+# BM25 상위 k개 [(chunk_id, score)]
+#   stats: corpus_stats() 결과 (읽기 전용 인덱스에서는 한 번만 계산해서 재사용)
+def bm25_search(conn, query, k, stats):
+    count, avg_length = stats
+    terms = Counter(tokenize(query))
+    if not terms or not count:
+        return []
+
+    marks = ",".join("?" * len(terms))
+    df = dict(conn.execute(
+        f"SELECT term, COUNT(*) FROM postings WHERE term IN ({marks}) GROUP BY term", list(terms)
+    ))
+    # 거의 모든 조각에 나오는 term(조사 bigram 등)은 점수 기여가 작고 postings만 길어서 제외
+    terms = {term: qtf for term, qtf in terms.items() if term in df and df[term] <= max(1, count * SPARSE_MAX_DF)}
+    if not terms:
+        return []
+
+    marks = ",".join("?" * len(terms))
+    rows = conn.execute(
+        f"SELECT p.term, p.chunk_id, p.tf, l.length FROM postings p "
+        f"JOIN chunk_lengths l ON l.chunk_id = p.chunk_id WHERE p.term IN ({marks})",
+        list(terms),
+    )
+    scores = defaultdict(float)
+    for term, chunk_id, tf, length in rows:
+        idf = math.log(1 + (count - df[term] + 0.5) / (df[term] + 0.5))
+        norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+        scores[chunk_id] += terms[term] * idf * tf * (BM25_K1 + 1) / norm
+    return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+
+# 순위(0부터) 하나의 RRF 점수
+def rrf_score(rank, rrf_k=60):
+    return 1.0 / (rrf_k + rank + 1)
+
+# 순위 목록 여러 개를 reciprocal-rank fusion으로 합침 (점수 척도가 달라도 순위만 사용)
+def rrf_fuse(rankings, k, rrf_k=60):
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] += rrf_score(rank, rrf_k)
+    return sorted(scores.items(), key=lambda item: -item[1])[:k]
@@ -0,0 +1,203 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from summary_cache import cache_key
+from chunking import token_counter
+
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gpt-4.1")
+SUMMARY_MAX_IN_FLIGHT = int(os.getenv("SUMMARY_MAX_IN_FLIGHT", "4"))  # 동시 요청 수
+SUMMARY_TPM = int(os.getenv("SUMMARY_TPM", "30000"))  # 분당 토큰 예산 (0이면 제한 없음)
+SUMMARY_CONTEXT_TOKENS = int(os.getenv("SUMMARY_CONTEXT_TOKENS", "100000"))  # reduce 1회에 넣을 최대 입력 토큰
+SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", "5"))
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# 분당 토큰 예산을 지키는 token bucket
+class TokenBudget:
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        if not self.capacity:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+                self.updated = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return
+                wait = (tokens - self.available) * 60 / self.capacity
+            time.sleep(wait)
+
+
+def _status_code(error):
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# chunk 하나라도 재시도 후에도 요약하지 못하면 발생 → 일부만 요약된 결과를 저장하지 않고 호출 쪽에서 재시도
+class SummaryError(Exception):
+    pass
+
+
+# map(chunk별 요약, 병렬) → reduce(부분 요약 합치기, 필요하면 여러 단계) 요약 엔진
+class Summarizer:
+    def __init__(self, client, map_prompt, reduce_prompt, system_prompt, cache=None,
+                 model=SUMMARY_MODEL, max_tokens=1000, temperature=0.3,
+                 max_in_flight=SUMMARY_MAX_IN_FLIGHT, tokens_per_minute=SUMMARY_TPM,
+                 context_tokens=SUMMARY_CONTEXT_TOKENS, max_retries=SUMMARY_MAX_RETRIES):
+        self.client = client
+        self.cache = cache
+        self.model = model
+        self.system_prompt = system_prompt
+        self.map_prompt = map_prompt
+        self.reduce_prompt = reduce_prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.context_tokens = context_tokens
+        self.max_retries = max_retries
+        self.counter = token_counter(model)
+        self.budget = TokenBudget(tokens_per_minute)
+        self.pool = ThreadPoolExecutor(max_workers=max_in_flight)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def _create(self, request):
+        prompt_tokens = sum(self.counter.count(m["content"]) for m in request["messages"])
+        self.budget.acquire(prompt_tokens + self.max_tokens)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.chat.completions.create(**request)
+                break
+            except Exception as e:
+                if _status_code(e) not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                delay = _retry_after(e) or min(60, 2 ** attempt + random.uniform(0, 1))
+                print(f"⏳ API 제한/오류({_status_code(e)}), {delay:.1f}s 후 재시도 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            self.calls += 1
+            if usage is not None:
+                self.tokens_in += usage.prompt_tokens
+                self.tokens_out += usage.completion_tokens
+        return response.choices[0].message.content.strip()
+
+    def complete(self, prompt, text):
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": prompt.format(text=text)},
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+        }
+        key = cache_key(**request)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        content = self._create(request)
+        if self.cache is not None and content:
+            self.cache.put(key, content)
+        return content
+
+    def _complete_nonempty(self, prompt, text):
+        content = self.complete(prompt, text)
+        if not content:
+            raise SummaryError("빈 응답")
+        return content
+
+    # 순서를 유지한 채 병렬 요약, 동시 요청 수는 pool 크기로 제한
+    # 하나라도 실패하면 아직 시작하지 않은 요청은 취소하고 SummaryError
+    def map(self, prompt, texts):
+        texts = list(texts)
+        futures = [self.pool.submit(self._complete_nonempty, prompt, t) for t in texts]
+        results = []
+        for i, future in enumerate(futures, 1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                for other in futures:
+                    other.cancel()
+                raise SummaryError(f"부분 요약 {i}/{len(texts)} 실패: {e}") from e
+        return results
+
+    # 합친 길이가 context를 넘으면 묶음 단위로 먼저 요약한 뒤 다시 합침
+    def reduce(self, partials, max_depth=4):
+        for _ in range(max_depth):
+            if len(partials) <= 1:
+                break
+            groups = self._group(partials)
+            if len(groups) == 1:
+                break
+            print(f"🌀 부분 요약 {len(partials)}개 → {len(groups)}묶음 중간 요약 중...")
+            partials = self.map(self.reduce_prompt, ["\n".join(g) for g in groups])
+
+        if len(partials) == 1:
+            return partials[0]
+        partials = self._fit(partials)
+        print("🌀 최종 요약 중...")
+        try:
+            return self._complete_nonempty(self.reduce_prompt, "\n".join(partials))
+        except Exception as e:
+            raise SummaryError(f"최종 요약 실패: {e}") from e
+
+    # max_depth번 합쳐도 context를 넘으면 최종 요청이 모델 입력 한도를 넘지 않도록 앞에서부터 context_tokens까지만 사용
+    def _fit(self, partials):
+        kept, size = [], 0
+        for partial in partials:
+            tokens = self.counter.count(partial) + 1  # "\n" 구분자
+            if size + tokens > self.context_tokens:
+                remaining = self.context_tokens - size - 1
+                if remaining > 0:
+                    kept.append(self.counter.decode(self.counter.encode(partial)[:remaining]))
+                print(f"⚠️ 부분 요약 {len(partials)}개가 context({self.context_tokens} 토큰)를 넘어 "
+                      f"{len(kept)}개까지만 최종 요약에 사용")
+                return kept
+            kept.append(partial)
+            size += tokens
+        return kept
+
+    def _group(self, partials):
+        groups, current, size = [], [], 0
+        for partial in partials:
+            tokens = self.counter.count(partial)
+            if current and size + tokens > self.context_tokens:
+                groups.append(current)
+                current, size = [], 0
+            current.append(partial)
+            size += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    def summarize(self, chunks):
+        chunks = list(chunks)
+        if not chunks:
+            return ""
+        print(f"✂️ {len(chunks)}개 chunk 병렬 요약 중...")
+        return self.reduce(self.map(self.map_prompt, chunks))
@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", "data/cache/summaries.sqlite")
+SUMMARY_CACHE_MAX_MB = float(os.getenv("SUMMARY_CACHE_MAX_MB", "500"))
+
+
+# 모델, 메시지(프롬프트 + chunk 본문), 파라미터 전체를 해시 → 어느 하나라도 바뀌면 다른 키
+def cache_key(**request):
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# LLM 응답을 SQLite에 저장하는 content-addressed 캐시, 용량 초과 시 오래 안 쓴 항목부터 삭제
+class SummaryCache:
+    def __init__(self, path=SUMMARY_CACHE_PATH, max_mb=SUMMARY_CACHE_MAX_MB):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def total_bytes(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        excess = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
@@ -0,0 +1,27 @@
+import os
+import json
+
+# 평가(evaluation) / 벤치마크(bench) / 인덱스 리포트(index_report)가 함께 쓰는 질의 테스트셋
+#   한 줄에 {"query": ..., "expected": [...]} 하나 (bench / index_report는 query만 사용)
+TESTSET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "testset.jsonl")
+
+
+def load_testset(path=TESTSET_PATH):
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                case = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"❌ 테스트셋 JSON 오류 ({path}:{lineno}): {e}") from e
+            if not isinstance(case, dict) or not isinstance(case.get("query"), str) or not case["query"].strip():
+                raise ValueError(f"❌ 테스트셋에 query가 없음 ({path}:{lineno})")
+            expected = case.setdefault("expected", [])
+            if not isinstance(expected, list) or not all(isinstance(t, str) for t in expected):
+                raise ValueError(f"❌ 테스트셋 expected는 문자열 목록이어야 함 ({path}:{lineno})")
+            cases.append(case)
+    if not cases:
+        raise ValueError(f"❌ 테스트셋이 비어 있음: {path}")
+    return cases
@@ -0,0 +1,637 @@
+import os
+import glob
+import json
+import math
+import hashlib
+import time
+import sqlite3
+import threading
+from typing import Any
+
+import faiss
+import numpy as np
+from pydantic import ConfigDict
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+import sparse_index
+import near_dup
+from metrics import timed
+
+# Learnmate 인덱스 디렉터리 구성
+#   index-<세대>.faiss : FAISS 인덱스 원본 (id = docs.sqlite의 chunks.id), 현재 파일 이름은 meta의 index_file
+#   docs.sqlite : chunk 본문 / source / chunk_idx, source별 content hash, 메타데이터, BM25 역색인,
+#                 chunk별 MinHash 서명, 임베딩하지 않은 유사 중복 chunk와 그 원본 id (원본이 지워지면 다시 검사)
+INDEX_FILE = "index.faiss"  # index_file meta가 없는 예전 인덱스 / LangChain 형식의 파일 이름
+DOCS_FILE = "docs.sqlite"
+VERSION_FILE = "VERSION"  # 저장할 때마다 바뀌는 버전 stamp → 서빙 프로세스가 변경을 감지
+LEGACY_DOCSTORE_FILE = "index.pkl"  # 예전 LangChain pickle docstore
+LEGACY_MANIFEST_FILE = "manifest.json"
+
+# 인덱스 종류
+#   flat: 정확, float32 / fp16, sq8, pq: 벡터 압축 저장 (brute-force)
+#   ivfpq, hnsw: 근사 최근접 탐색
+# INDEX_TYPE을 지정하지 않으면 기존 인덱스의 종류(meta)를 그대로 유지, 새 인덱스는 DEFAULT_INDEX_TYPE
+INDEX_TYPE = os.getenv("INDEX_TYPE") or None
+DEFAULT_INDEX_TYPE = "flat"
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1") != "0"  # 검색용 로드 시 mmap → 여러 챗봇 프로세스가 페이지 공유
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", "16"))  # IVF: 검색할 클러스터 수
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", "64"))  # HNSW: 검색 시 후보 리스트 크기
+HNSW_M = 32
+TRAIN_SAMPLE = 50000  # 학습에 쓸 최대 벡터 수
+MIN_TRAIN_VECTORS = 39 * 256  # PQ 코드북(256 centroid) 학습 최소 권장치, 이보다 적으면 flat 사용
+PQ_TYPES = {"pq", "ivfpq"}
+REPORT_QUERIES = 100
+INDEX_REPORT = os.getenv("INDEX_REPORT", "0") != "0"  # 1이면 압축/근사 인덱스 생성 시 flat 대비 recall / 크기 출력
+
+# 검색 방식: dense(FAISS만) / hybrid(FAISS + BM25를 reciprocal-rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))  # 각 검색기에서 가져올 후보 수
+RRF_K = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    chunk_idx INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source);
+CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, hash TEXT);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS skipped_chunks (
+    source TEXT NOT NULL,
+    original INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS skipped_chunks_source ON skipped_chunks (source);
+CREATE INDEX IF NOT EXISTS skipped_chunks_original ON skipped_chunks (original);
+""" + sparse_index.SPARSE_SCHEMA + near_dup.NEAR_DUP_SCHEMA
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+# docs.sqlite와 짝이 맞는 FAISS 파일 이름
+def current_index_file(conn):
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'index_file'").fetchone()
+    except sqlite3.OperationalError:  # meta 테이블이 없는 빈 파일
+        row = None
+    return row[0] if row else INDEX_FILE
+
+def remove_index_files(vector_dir, keep=()):
+    for path in glob.glob(os.path.join(vector_dir, "index*.faiss")) + \
+            glob.glob(os.path.join(vector_dir, "index*.faiss.tmp")):
+        if os.path.basename(path) not in keep:
+            os.remove(path)
+
+def index_version(vector_dir):
+    path = os.path.join(vector_dir, VERSION_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    index_path = os.path.join(vector_dir, INDEX_FILE)
+    return str(os.stat(index_path).st_mtime_ns) if os.path.exists(index_path) else None
+
+def is_legacy(vector_dir):
+    return os.path.exists(os.path.join(vector_dir, LEGACY_DOCSTORE_FILE)) \
+        and not os.path.exists(os.path.join(vector_dir, DOCS_FILE))
+
+
+# =========================
+# FAISS 인덱스 생성 / 검색 파라미터
+# =========================
+def pq_subquantizers(dim):
+    # dim을 나누어떨어지게 하는 m 중, sub-vector가 8차원 이상인 가장 큰 값 (<= 64)
+    return max(m for m in range(1, min(64, max(1, dim // 8)) + 1) if dim % m == 0)
+
+# IVF는 자체적으로 id를 저장, 나머지는 IDMap2로 감싸서 chunks.id를 그대로 FAISS id로 사용
+def index_factory_string(index_type, count, dim):
+    if index_type == "flat":
+        return "IDMap2,Flat"
+    if index_type == "fp16":
+        return "IDMap2,SQfp16"
+    if index_type == "sq8":
+        return "IDMap2,SQ8"
+    if index_type == "pq":
+        return f"IDMap2,PQ{pq_subquantizers(dim)}"
+    if index_type == "hnsw":
+        return f"IDMap2,HNSW{HNSW_M}"
+    if index_type == "ivfpq":
+        nlist = max(1, min(int(4 * math.sqrt(count)), count // 39))
+        return f"IVF{nlist},PQ{pq_subquantizers(dim)}"
+    raise ValueError(f"알 수 없는 INDEX_TYPE: {index_type}")
+
+# 벡터로 인덱스 생성 (학습이 필요한 종류는 표본으로 학습), 실제로 만든 종류도 함께 반환
+def build_faiss_index(vectors, index_type=None, ids=None):
+    index_type = index_type or INDEX_TYPE or DEFAULT_INDEX_TYPE
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count = len(vectors)
+    if index_type in PQ_TYPES and count < MIN_TRAIN_VECTORS:
+        print(f"ℹ️ 벡터 {count}개는 {index_type} 학습에 부족 → flat 인덱스 사용")
+        index_type = "flat"
+
+    index = _new_index(vectors, index_type, ids, verbose=True)
+    if INDEX_REPORT and index_type != "flat" and count:
+        report_tradeoff(index, vectors, index_type)
+    return index, index_type
+
+def _new_index(vectors, index_type, ids=None, verbose=False):
+    count, dim = vectors.shape
+    ids = np.arange(count, dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+    index = faiss.index_factory(dim, index_factory_string(index_type, count, dim))
+    if not index.is_trained:
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(count, min(count, TRAIN_SAMPLE), replace=False)]
+        if verbose:
+            print(f"🏋️ {index_type} 인덱스 학습 중 (표본 {len(sample)}개)")
+        index.train(sample)
+    if count:
+        index.add_with_ids(vectors, ids)
+    set_search_params(index)
+    return index
+
+# 코퍼스를 (인덱스에 넣을 벡터, held-out 질의 벡터)로 나눔, 코퍼스의 10% 이상은 떼지 않음
+#   인덱스에 들어 있는 벡터로 질의하면 자기 자신이 항상 1등이라 recall이 부풀려짐
+def split_heldout(vectors, num_heldout, seed=0):
+    num_heldout = min(num_heldout, len(vectors) // 10)
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    return vectors[order[num_heldout:]], vectors[order[:num_heldout]]
+
+# 압축/근사 인덱스의 메모리와 recall@10을 flat 기준으로 출력 (flat과 같은 종류의 인덱스를 하나씩 더 만들므로
+# INDEX_REPORT=1일 때만, 자세한 비교는 index_report.py)
+#   recall은 held-out 질의로, 질의를 뺀 나머지 벡터만 넣은 flat / 같은 종류 인덱스끼리 비교
+def report_tradeoff(index, vectors, index_type, k=10):
+    base, queries = split_heldout(vectors, REPORT_QUERIES, seed=1)
+    if not len(queries):
+        print(f"ℹ️ 벡터 {len(vectors)}개는 recall 측정용 held-out 질의를 떼기에 부족 → recall 생략")
+        recall = None
+    else:
+        exact = faiss.IndexFlatL2(base.shape[1])
+        exact.add(base)
+        _, truth = exact.search(queries, k)
+        _, found = _new_index(base, index_type).search(queries, k)
+        recall = sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / truth.size
+
+    size = faiss.serialize_index(index).nbytes
+    flat_size = vectors.nbytes
+    print(f"📦 {index_type}: {size / 1e6:.1f} MB (flat {flat_size / 1e6:.1f} MB, {flat_size / size:.1f}x), "
+          f"{size / len(vectors):.0f} B/vector" + (f", recall@{k} {recall:.3f} (held-out {len(queries)}개)"
+                                                   if recall is not None else ""))
+
+def set_search_params(index, nprobe=INDEX_NPROBE, ef_search=INDEX_EF_SEARCH):
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+    inner = faiss.downcast_index(index)
+    if hasattr(inner, "id_map"):
+        inner = faiss.downcast_index(inner.index)
+    hnsw = getattr(inner, "hnsw", None)
+    if hnsw is not None:
+        hnsw.efSearch = ef_search
+
+# mmap으로 읽으면 인덱스 데이터가 page cache에 한 번만 올라가 프로세스 간 공유됨
+#   IVF inverted list는 IO_FLAG_MMAP, flat / fp16 / sq8 / pq 코드는 IO_FLAG_MMAP_IFC (faiss 1.11+)
+#   faiss 1.15.1에서 IDMap2,Flat 200MB 인덱스: mmap 로드 시 익명 메모리 +10MB / 파일 매핑 +198MB (일반 로드는 익명 +205MB)
+MMAP_IFC = getattr(faiss, "IO_FLAG_MMAP_IFC", None)
+
+def read_faiss_index(path, mmap=INDEX_MMAP):
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        if MMAP_IFC is not None:
+            flags |= MMAP_IFC
+        else:
+            print(f"⚠️ faiss {faiss.__version__}는 flat 계열 코드 mmap 미지원 → 프로세스마다 메모리에 복사됨 "
+                  f"(faiss-cpu 1.11 이상 필요)")
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            print(f"ℹ️ mmap 로드 불가, 메모리로 로드: {e}")
+    return faiss.read_index(path)
+
+
+# =========================
+# 인덱스 + 문서 저장소
+# =========================
+# 검색 시 top-k 문서만 SQLite에서 읽어 Document로 만듦 → 시작 시간이 코퍼스 크기와 무관
+class LearnmateIndex:
+    def __init__(self, vector_dir, embedding, index, conn, mode=RETRIEVAL_MODE):
+        self.vector_dir = vector_dir
+        self.embedding = embedding
+        self.index = index
+        self.conn = conn
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._sparse_stats = None
+
+    @classmethod
+    def open(cls, vector_dir, embedding, mmap=INDEX_MMAP, nprobe=INDEX_NPROBE, ef_search=INDEX_EF_SEARCH,
+             readonly=True):
+        docs_path = os.path.join(vector_dir, DOCS_FILE)
+        if readonly:
+            conn = sqlite3.connect(f"file:{docs_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(vector_dir, exist_ok=True)
+            conn = sqlite3.connect(docs_path, check_same_thread=False)
+            conn.executescript(SCHEMA)
+        index = None
+        index_path = os.path.join(vector_dir, current_index_file(conn))
+        if os.path.exists(index_path):
+            index = read_faiss_index(index_path, mmap and readonly)
+            set_search_params(index, nprobe, ef_search)
+        return cls(vector_dir, embedding, index, conn)
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def count(self):
+        return self.index.ntotal if self.index is not None else 0
+
+    def get_documents(self, ids):
+        ids = [int(i) for i in ids]
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self.conn.execute(f"SELECT id, text, metadata FROM chunks WHERE id IN ({marks})", ids).fetchall()
+        return {row[0]: Document(page_content=row[1], metadata=json.loads(row[2])) for row in rows}
+
+    # FAISS 상위 k개 [(doc, L2 거리)], 거리는 작을수록 가까움 (metadata["dense_distance"]에도 기록)
+    def search_by_vector(self, vector, k=4):
+        if self.index is None or self.count == 0:
+            return []
+        scores, ids = self.index.search(np.asarray([vector], dtype=np.float32), k)
+        hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+        docs = self.get_documents([i for i, _ in hits])
+        for i, distance in hits:
+            if i in docs:
+                docs[i].metadata["dense_distance"] = distance
+        return [(docs[i], s) for i, s in hits if i in docs]
+
+    # BM25 상위 k개 [(chunk_id, score)], 역색인이 없는 예전 인덱스면 빈 목록
+    def sparse_search(self, query, k=4):
+        with self._lock:
+            if self._sparse_stats is None:
+                self._sparse_stats = sparse_index.corpus_stats(self.conn) \
+                    if sparse_index.has_sparse(self.conn) else (0, 1.0)
+            return sparse_index.bm25_search(self.conn, query, k, self._sparse_stats)
+
+    # dense / sparse 후보를 각각 candidates개씩 가져와 RRF로 합친 뒤 상위 k개 (점수 = RRF 점수)
+    # 후보에 들었던 검색기의 원래 점수는 metadata의 dense_distance / bm25_score에 기록
+    def hybrid_search_by_vector(self, query, vector, k=4, candidates=HYBRID_CANDIDATES):
+        candidates = max(k, candidates)
+        dense = {}
+        if self.index is not None and self.count:
+            distances, ids = self.index.search(np.asarray([vector], dtype=np.float32), candidates)
+            dense = {int(i): float(d) for i, d in zip(ids[0], distances[0]) if i >= 0}
+        sparse = dict(self.sparse_search(query, candidates))
+        fused = sparse_index.rrf_fuse([list(dense), list(sparse)], k, RRF_K)
+        docs = self.get_documents([i for i, _ in fused])
+        for i, _ in fused:
+            if i in docs:
+                if i in dense:
+                    docs[i].metadata["dense_distance"] = dense[i]
+                if i in sparse:
+                    docs[i].metadata["bm25_score"] = sparse[i]
+        return [(docs[i], s) for i, s in fused if i in docs]
+
+    # 질의 임베딩을 이미 계산했으면 vector로 넘겨서 재사용
+    # 점수는 검색 방식과 상관없이 RRF 점수(순위 기반, 클수록 관련) → dense 모드는 FAISS 순위 하나로 계산
+    # 검색기별 원래 점수(dense_distance: L2 거리, bm25_score)는 doc.metadata에
+    def search(self, query, k=4, vector=None):
+        if vector is None:
+            vector = self.embedding.embed_query(query)
+        if self.mode == "hybrid":
+            return self.hybrid_search_by_vector(query, vector, k)
+        return [(doc, sparse_index.rrf_score(rank, RRF_K))
+                for rank, (doc, _) in enumerate(self.search_by_vector(vector, k))]
+
+    def similarity_search_with_score(self, query, k=4):
+        return self.search(query, k)
+
+    def similarity_search(self, query, k=4):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    # reranker를 넘기면 후보를 reranker.candidates개 가져와 다시 채점한 뒤 상위 k개
+    def as_retriever(self, search_kwargs=None, reranker=None):
+        return IndexRetriever(store=self, k=(search_kwargs or {}).get("k", 4), reranker=reranker)
+
+    def iter_texts(self, batch_size=1000):
+        cursor = self.conn.execute("SELECT id, text FROM chunks ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    # 새 세대 파일(index-<n>.faiss)에 쓴 뒤, 그 이름을 meta(index_file)에 기록하고 chunk 변경과 함께 커밋
+    #   → 커밋 전에 죽으면 meta는 이전 파일을 가리키고 chunk 변경도 롤백되어 FAISS id와 chunk 행이 항상 짝이 맞음
+    # 마지막에 버전 stamp 갱신, 이전 세대 파일은 하나만 남김 (방금 전 이름을 읽은 서빙 프로세스가 열 수 있도록)
+    def save(self):
+        previous = current_index_file(self.conn)
+        name = f"index-{time.time_ns()}.faiss"
+        path = os.path.join(self.vector_dir, name)
+        faiss.write_index(self.index, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.set_meta("index_file", name)
+        self.conn.commit()
+
+        version_path = os.path.join(self.vector_dir, VERSION_FILE)
+        with open(version_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(f"{time.time_ns()}-{self.count}\n")
+        os.replace(version_path + ".tmp", version_path)
+        remove_index_files(self.vector_dir, keep={name, previous})
+
+    def close(self):
+        self.conn.close()
+
+
+# RetrievalQA 등 LangChain 체인에 넘길 수 있는 retriever
+class IndexRetriever(BaseRetriever):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    store: Any
+    k: int = 4
+    reranker: Any = None
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        if self.reranker is None:
+            return [doc for doc, _ in self.store.search(query, self.k)]
+        candidates = [doc for doc, _ in self.store.search(query, max(self.k, self.reranker.candidates))]
+        return [doc for doc, _ in self.reranker.rerank(query, candidates, self.k)]
+
+
+# 검색용 로드: 질의 시점 파라미터(nprobe / efSearch)를 환경변수 값으로 설정, 인덱스는 mmap 읽기 전용
+def load_index(vector_dir, embedding, nprobe=INDEX_NPROBE, ef_search=INDEX_EF_SEARCH, mmap=INDEX_MMAP):
+    if is_legacy(vector_dir):
+        migrate_legacy(vector_dir, embedding)
+    return LearnmateIndex.open(vector_dir, embedding, mmap=mmap, nprobe=nprobe, ef_search=ef_search)
+
+
+# 서빙 프로세스(API 서버 / Streamlit 챗봇)의 여러 스레드가 함께 쓰는 검색용 인덱스
+#   VERSION이 바뀌면 lock 안에서 한 번만 다시 로드 (동시에 들어온 요청이 각자 로드하지 않음)
+#   이전 인덱스(SQLite 연결 + mmap된 FAISS 파일)는 그 인덱스로 검색 중인 요청이 모두 release한 뒤에 닫음
+class SharedIndex:
+    def __init__(self, vector_dir, embedding):
+        self.vector_dir = vector_dir
+        self.embedding = embedding
+        self.db = None
+        self.version = None
+        self._lock = threading.Lock()
+        self._readers = {}  # 인덱스 → 그 인덱스로 검색 중인 요청 수
+
+    def acquire(self):
+        with self._lock:
+            version = index_version(self.vector_dir)
+            if self.db is None or version != self.version:
+                db = load_index(self.vector_dir, self.embedding)
+                old, self.db, self.version = self.db, db, version
+                if old is not None and not self._readers.get(old):
+                    old.close()
+            self._readers[self.db] = self._readers.get(self.db, 0) + 1
+            return self.db, self.version
+
+    def release(self, db):
+        with self._lock:
+            self._readers[db] -= 1
+            if self._readers[db]:
+                return
+            del self._readers[db]
+            if db is not self.db:
+                db.close()
+
+    # 첫 요청 전에 미리 로드
+    def load(self):
+        db, version = self.acquire()
+        self.release(db)
+        return version
+
+    def close(self):
+        with self._lock:
+            if self.db is not None and not self._readers.get(self.db):
+                self.db.close()
+            self.db = None
+
+
+# 예전 형식(LangChain FAISS.save_local: index.faiss + index.pkl)을 한 번만 변환
+def migrate_legacy(vector_dir, embedding, model_name=None):
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import Embeddings
+
+    if not isinstance(embedding, Embeddings):
+        Embeddings.register(type(embedding))  # BatchEmbedder / CachedEmbeddings: 같은 인터페이스, 상속만 안 함
+
+    print(f"🔄 예전 형식(pickle docstore) 인덱스 변환 중: {vector_dir}")
+    db = FAISS.load_local(vector_dir, embedding, allow_dangerous_deserialization=True)
+    manifest = {}
+    manifest_path = os.path.join(vector_dir, LEGACY_MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    docs = [db.docstore.search(doc_id) for _, doc_id in sorted(db.index_to_docstore_id.items())]
+    try:
+        vectors = db.index.reconstruct_n(0, db.index.ntotal)
+    except RuntimeError:
+        vectors = np.asarray(embedding.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+
+    store = LearnmateIndex.open(vector_dir, embedding, readonly=False)
+    try:
+        ids = [_insert_chunk(store.conn, doc) for doc in docs]
+        for source, entry in manifest.get("sources", {}).items():
+            store.conn.execute("INSERT OR REPLACE INTO sources (source, hash) VALUES (?, ?)", (source, entry.get("hash")))
+        for source in {doc.metadata.get("source") for doc in docs} - set(manifest.get("sources", {})):
+            store.conn.execute("INSERT OR IGNORE INTO sources (source, hash) VALUES (?, NULL)", (source,))
+        store.index, index_type = build_faiss_index(vectors, manifest.get("index_type", "flat"), ids)
+        if manifest.get("model") or model_name:
+            store.set_meta("model", manifest.get("model") or model_name)
+        store.set_meta("index_type", index_type)
+        store.save()
+    except Exception:
+        # 변환 도중 실패하면 docs.sqlite를 지워서 다음 실행 때 다시 변환
+        store.close()
+        os.remove(os.path.join(vector_dir, DOCS_FILE))
+        raise
+    store.close()
+
+    os.remove(os.path.join(vector_dir, LEGACY_DOCSTORE_FILE))
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    print(f"✅ 변환 완료: {len(ids)}개 조각")
+
+
+def _insert_chunk(conn, doc, signature=None):
+    metadata = dict(doc.metadata)
+    cursor = conn.execute(
+        "INSERT INTO chunks (source, chunk_idx, text, metadata) VALUES (?, ?, ?, ?)",
+        (metadata.get("source") or "", metadata.get("chunk_idx", 0), doc.page_content,
+         json.dumps(metadata, ensure_ascii=False)),
+    )
+    sparse_index.index_chunk(conn, cursor.lastrowid, doc.page_content)
+    near_dup.add(conn, cursor.lastrowid, signature if signature is not None else near_dup.signature(doc.page_content))
+    return cursor.lastrowid
+
+def _skip_chunk(conn, doc, original):
+    conn.execute(
+        "INSERT INTO skipped_chunks (source, original, text, metadata) VALUES (?, ?, ?, ?)",
+        (doc.metadata.get("source") or "", original, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False)),
+    )
+
+# 원본 chunk가 지워진 중복 chunk를 skipped_chunks에서 꺼내 Document로 반환
+def _revive_skipped(conn, original_ids):
+    docs = []
+    for start in range(0, len(original_ids), 500):
+        batch = original_ids[start:start + 500]
+        marks = ",".join("?" * len(batch))
+        rows = conn.execute(f"SELECT text, metadata FROM skipped_chunks WHERE original IN ({marks})", batch)
+        docs.extend(Document(page_content=text, metadata=json.loads(metadata)) for text, metadata in rows)
+        conn.execute(f"DELETE FROM skipped_chunks WHERE original IN ({marks})", batch)
+    return docs
+
+def _embed(embedding, texts):
+    return np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+
+
+# source(.md)별 content hash를 비교해서 바뀐 문서만 임베딩
+#   sources: {source: text}
+#   split_fn(source, text) -> [Document]
+#   prune=True 이면 sources에 없는 문서는 인덱스에서 제거
+# 대부분 제자리에서 삭제/추가, HNSW처럼 삭제가 안 되는 인덱스나 종류가 바뀐 경우엔 남은 문서로 다시 생성
+# (임베딩 캐시 덕분에 재생성 시 기존 문서는 다시 계산하지 않음)
+# dedup=True 이면 이미 색인된(또는 이번에 먼저 추가된) chunk와 거의 같은 chunk는 건너뜀
+#   → 같은 내용이 top-k를 여러 자리 차지하지 않고 임베딩 수도 줄어듦 (원본 source가 바뀌어도 되살리지는 않음)
+# metrics(RunMetrics)를 넘기면 chunk / dedup / embed / index_write 단계 시간 기록
+def update_index(vector_dir, embedding, sources, split_fn, model_name=None, prune=False, rebuild=False,
+                 index_type=INDEX_TYPE, metrics=None, dedup=near_dup.NEAR_DUP):
+    if is_legacy(vector_dir):
+        migrate_legacy(vector_dir, embedding, model_name)
+    if rebuild:
+        remove_index_files(vector_dir)
+        if os.path.exists(os.path.join(vector_dir, DOCS_FILE)):
+            os.remove(os.path.join(vector_dir, DOCS_FILE))
+
+    store = LearnmateIndex.open(vector_dir, embedding, readonly=False)
+    conn = store.conn
+    # 모델이 바뀌면 docs.sqlite에 저장된 모든 chunk 본문을 새 모델로 다시 임베딩
+    # (sources에는 이번에 바뀐 문서만 들어올 수 있으므로 기존 chunk / source 행은 지우지 않음)
+    if model_name and store.get_meta("model") not in (None, model_name):
+        print(f"♻️ 임베딩 모델 변경 감지 ({store.get_meta('model')} → {model_name}), 저장된 조각 전체 재임베딩")
+        store.index = None
+    index_type = index_type or store.get_meta("index_type") or DEFAULT_INDEX_TYPE
+    backfilled = sparse_index.backfill(conn)
+    if dedup:
+        backfilled += near_dup.backfill(conn)
+
+    known = dict(conn.execute("SELECT source, hash FROM sources"))
+    stale_sources, new_entries = [], []
+    skipped = 0
+    for source, text in sources.items():
+        digest = content_hash(text)
+        if source in known and known[source] == digest:
+            skipped += 1
+            continue
+        if source in known:
+            stale_sources.append(source)
+        with timed(metrics, "chunk") as fields:
+            docs = split_fn(source, text)
+            fields["chunks"] = len(docs)
+        new_entries.append((source, digest, docs))
+
+    removed = 0
+    if prune:
+        for source in known:
+            if source not in sources:
+                stale_sources.append(source)
+                removed += 1
+
+    new_count = sum(len(docs) for _, _, docs in new_entries)
+    print(f"🧮 인덱스 갱신: 신규/변경 {len(new_entries)}개 문서 ({new_count}개 조각), "
+          f"변경 없음 {skipped}개, 삭제 {removed}개")
+    # 문서가 그대로여도 인덱스 종류가 바뀌었으면 재생성 (PQ 학습에 벡터가 부족해 flat으로 둔 경우는 제외)
+    current_type = store.get_meta("index_type", "flat")
+    type_changed = current_type != index_type and not (
+        index_type in PQ_TYPES and current_type == "flat" and store.count < MIN_TRAIN_VECTORS)
+    if not new_entries and not stale_sources and store.index is not None and not type_changed:
+        if backfilled:
+            with timed(metrics, "index_write"):
+                store.save()
+        store.close()
+        return load_index(vector_dir, embedding)
+
+    # SQLite 변경은 새 FAISS 파일을 쓴 뒤 index_file meta와 함께 커밋 (save)
+    stale_ids = []
+    for source in stale_sources:
+        stale_ids.extend(row[0] for row in conn.execute("SELECT id FROM chunks WHERE source = ?", (source,)))
+        conn.execute("DELETE FROM chunks WHERE source = ?", (source,))
+        conn.execute("DELETE FROM skipped_chunks WHERE source = ?", (source,))
+        if source not in sources:
+            conn.execute("DELETE FROM sources WHERE source = ?", (source,))
+
+    sparse_index.remove_chunks(conn, stale_ids)
+    near_dup.remove(conn, stale_ids)
+    revived = _revive_skipped(conn, stale_ids)
+
+    # 유사 중복 chunk는 색인하지 않고 원본 chunk id와 함께 skipped_chunks에 보관 (source의 hash는 기록)
+    # 원본이 바뀌거나 삭제되면 보관해 둔 chunk(revived)를 다시 검사해서 색인
+    new_ids, new_texts = [], []
+    duplicates = 0
+    with timed(metrics, "dedup", items=new_count + len(revived)) as fields:
+        for source, digest, docs in new_entries + [(None, None, revived)]:
+            for doc in docs:
+                signature = near_dup.signature(doc.page_content)
+                match = near_dup.find(conn, signature) if dedup else None
+                if match is not None:
+                    _skip_chunk(conn, doc, int(match[0]))
+                    duplicates += 1
+                    continue
+                new_ids.append(_insert_chunk(conn, doc, signature))
+                new_texts.append(doc.page_content)
+            if source is not None:
+                conn.execute("INSERT OR REPLACE INTO sources (source, hash) VALUES (?, ?)", (source, digest))
+        fields["chunk_duplicates"] = duplicates
+    if revived:
+        print(f"♻️ 원본이 바뀌거나 삭제된 중복 조각 {len(revived)}개 다시 검사")
+    if duplicates:
+        print(f"♊ 유사 중복 조각 {duplicates}개 제외")
+
+    if store.index is not None and index_type in PQ_TYPES and current_type == "flat" \
+            and store.count + len(new_ids) < MIN_TRAIN_VECTORS:
+        index_type = "flat"  # 아직 PQ 학습에 부족 → flat 유지
+    if store.index is not None and current_type != index_type:
+        print(f"♻️ 인덱스 종류 변경 ({current_type} → {index_type}), 기존 문서로 재생성")
+    in_place = store.index is not None and current_type == index_type \
+        and (index_type != "hnsw" or not stale_ids)
+
+    if in_place:
+        if stale_ids:
+            store.index.remove_ids(np.asarray(stale_ids, dtype=np.int64))
+        if new_ids:
+            with timed(metrics, "embed", items=len(new_texts)):
+                vectors = _embed(embedding, new_texts)
+            store.index.add_with_ids(vectors, np.asarray(new_ids, dtype=np.int64))
+    else:
+        rows = list(store.iter_texts())
+        if not rows:
+            conn.rollback()
+            store.close()
+            return None
+        ids = [row[0] for row in rows]
+        with timed(metrics, "embed", items=len(rows)):
+            vectors = _embed(embedding, [row[1] for row in rows])
+        store.index, index_type = build_faiss_index(vectors, index_type, ids)
+
+    if model_name:
+        store.set_meta("model", model_name)
+    store.set_meta("index_type", index_type)
+    with timed(metrics, "index_write", chunks=store.count):
+        store.save()
+    store.close()
+    return load_index(vector_dir, embedding)
@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import near_dup
+
+# 수집 작업 큐: 논문별 진행 상태를 SQLite에 저장 → 중간에 죽어도 다음 실행에서 멈춘 지점부터 이어서 처리
+#   discovered → downloaded → extracted → summarized → embedded
+#   (failed: 재시도 INGEST_MAX_ATTEMPTS회 초과, duplicate: 본문이 먼저 들어온 논문(duplicate_of)과 거의 같아 요약하지 않음)
+# 상태가 바뀔 때마다 바로 커밋 → 이미 끝난 단계(특히 유료 요약 API 호출)는 다시 실행하지 않음
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", "data/ingest_queue.sqlite")
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+
+STATES = ["discovered", "downloaded", "extracted", "summarized", "embedded", "failed", "duplicate"]
+# 유사 중복 판정의 원본이 될 수 있는 상태 (요약까지 끝난 논문만, 실패하거나 아직 처리 중인 논문은 제외)
+NEAR_DUP_STATES = ("summarized", "embedded")
+# MinHash key = "<종류>:<논문 id>", 초록은 초록끼리 / 추출한 본문은 본문끼리만 비교
+NEAR_DUP_KINDS = ("abstract", "text")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    pdf_url TEXT,
+    source TEXT,
+    title TEXT,
+    doi TEXT,
+    title_hash TEXT,
+    duplicate_of TEXT,
+    state TEXT NOT NULL,
+    pdf_path TEXT,
+    md_path TEXT,
+    text TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_state ON papers (state);
+"""
+DEDUP_INDEXES = """
+CREATE INDEX IF NOT EXISTS papers_doi ON papers (doi);
+CREATE INDEX IF NOT EXISTS papers_title_hash ON papers (title_hash);
+"""
+# 나중에 추가된 컬럼: 예전 큐 파일은 열 때 ALTER TABLE로 보충
+ADDED_COLUMNS = ["pdf_url", "source", "title", "doi", "title_hash", "duplicate_of"]
+
+FIELDS = {"url", "pdf_url", "source", "title", "doi", "title_hash", "duplicate_of", "pdf_path", "md_path", "text",
+          "error"}
+
+
+class WorkQueue:
+    def __init__(self, path=INGEST_QUEUE_PATH, max_attempts=INGEST_MAX_ATTEMPTS):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        # 추출 feeder 스레드에서도 접근하므로 연결 하나를 lock으로 보호
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA + near_dup.NEAR_DUP_SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        for column in ADDED_COLUMNS:
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE papers ADD COLUMN {column} TEXT")
+        self.conn.executescript(DEDUP_INDEXES)
+        self._migrate_near_dup_keys()
+        self._lock = threading.Lock()
+
+    # 처음 보는 논문이면 등록하고 True
+    def discover(self, paper_id, state="discovered", **fields):
+        assert set(fields) <= FIELDS, fields
+        columns = ["id", "state", "updated_at", *fields]
+        with self._lock:
+            cursor = self.conn.execute(
+                f"INSERT OR IGNORE INTO papers ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [paper_id, state, _now(), *fields.values()],
+            )
+            self.conn.commit()
+            return cursor.rowcount > 0
+
+    # DOI 또는 제목 hash가 같은 논문이 이미 큐에 있으면 그 id
+    def find_duplicate(self, doi=None, title_hash=None):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id FROM papers WHERE (doi IS NOT NULL AND doi = ?) "
+                "OR (title_hash IS NOT NULL AND title_hash = ?) LIMIT 1",
+                (doi, title_hash),
+            ).fetchone()
+        return row[0] if row else None
+
+    # 본문이 같은 종류(kind)로 등록된 논문과 거의 같으면 (원본 id, 유사도), 아니면 이 논문의 MinHash 서명을 등록하고 None
+    #   서명은 바로 등록하지만 원본으로 인정하는 것은 요약까지 끝난(NEAR_DUP_STATES) 논문뿐
+    def check_near_duplicate(self, paper_id, text, kind="text", threshold=near_dup.NEAR_DUP_THRESHOLD):
+        assert kind in NEAR_DUP_KINDS, kind
+        signature = near_dup.signature(text)
+        key = f"{kind}:{paper_id}"
+        with self._lock:
+            match = near_dup.find(self.conn, signature, threshold, exclude=key,
+                                  accept=lambda keys: self._near_dup_originals(kind, keys))
+            if match is None:
+                near_dup.add(self.conn, key, signature)
+                self.conn.commit()
+        if match is None:
+            return None
+        return match[0].split(":", 1)[1], match[1]
+
+    def _near_dup_originals(self, kind, keys):
+        prefix = f"{kind}:"
+        ids = {key[len(prefix):]: key for key in keys if key.startswith(prefix)}
+        if not ids:
+            return []
+        rows = self.conn.execute(
+            f"SELECT id FROM papers WHERE state IN ({', '.join('?' * len(NEAR_DUP_STATES))}) "
+            f"AND id IN ({', '.join('?' * len(ids))})",
+            [*NEAR_DUP_STATES, *ids],
+        )
+        return [ids[row[0]] for row in rows]
+
+    # 종류 구분 전의 key(논문 id만)는 추출 본문으로 간주
+    def _migrate_near_dup_keys(self):
+        legacy = " AND ".join(f"key NOT LIKE '{kind}:%'" for kind in NEAR_DUP_KINDS)
+        for table in ("minhash", "lsh_buckets"):
+            self.conn.execute(f"UPDATE {table} SET key = 'text:' || key WHERE {legacy}")
+        self.conn.commit()
+
+    # 다음 상태로 이동, fields(pdf_path, md_path, text ...)도 함께 갱신. text=None으로 본문을 비울 수 있음
+    def advance(self, paper_id, state, **fields):
+        assert state in STATES, state
+        assert set(fields) <= FIELDS, fields
+        sets = ", ".join(f"{key} = ?" for key in ["state", "error", "updated_at", *fields])
+        with self._lock:
+            self.conn.execute(f"UPDATE papers SET {sets} WHERE id = ?",
+                              [state, None, _now(), *fields.values(), paper_id])
+            self.conn.commit()
+
+    def advance_many(self, paper_ids, state):
+        with self._lock:
+            self.conn.executemany("UPDATE papers SET state = ?, error = NULL, updated_at = ? WHERE id = ?",
+                                  [(state, _now(), paper_id) for paper_id in paper_ids])
+            self.conn.commit()
+
+    # 실패 기록: 상태는 그대로 두어 다음 실행에서 재시도, 시도 횟수를 넘기면 failed. failed가 되면 True
+    def record_error(self, paper_id, error):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE papers SET attempts = attempts + 1, error = ?, updated_at = ?, "
+                "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE state END WHERE id = ?",
+                (str(error)[:1000], _now(), self.max_attempts, paper_id),
+            )
+            self.conn.commit()
+            row = self.conn.execute("SELECT state FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return row is not None and row["state"] == "failed"
+
+    def get(self, paper_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM papers WHERE id = ?", (paper_id,)).fetchone()
+        return dict(row) if row else None
+
+    # 본문(text)은 필요한 경우에만 읽음
+    def items(self, state, with_text=False):
+        columns = "*" if with_text else "id, url, pdf_url, source, title, state, pdf_path, md_path, attempts, error"
+        with self._lock:
+            rows = self.conn.execute(f"SELECT {columns} FROM papers WHERE state = ? ORDER BY updated_at",
+                                     (state,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, state):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM papers WHERE state = ?", (state,)).fetchone()[0]
+
+    def counts(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM papers GROUP BY state").fetchall()
+        return {state: n for state, n in rows}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
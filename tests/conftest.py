@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+# scripts/의 모듈은 패키지가 아니라 스크립트 디렉터리 기준으로 서로 import함
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+
+# 텍스트 hash로 만드는 결정적 임베딩 (모델 없이 색인·검색 경로 전체를 실행), 호출마다 배치 크기 기록
+class HashEmbedding:
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(len(texts))
+        return [np.frombuffer(hashlib.sha256(t.encode("utf-8")).digest(), dtype=np.uint8)[:self.dim]
+                .astype(np.float32) for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+# update_index의 split_fn: 문서 하나 = 조각 하나
+def split(source, text):
+    return [Document(page_content=text, metadata={"source": source, "chunk_idx": 0})]
+
+
+# 경로별로 (status, headers, body) 응답 목록을 차례로 돌려주는 로컬 HTTP 서버, 마지막 응답은 계속 반복
+#   routes는 query string을 뺀 경로로 찾고, hits에는 query string까지 포함한 경로를 기록
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits.append((self.path, time.monotonic()))
+        responses = self.server.routes.get(urlsplit(self.path).path, [(404, {}, b"")])
+        status, headers, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        self.send_response(status)
+        headers = {"Content-Length": str(len(body)), **headers}
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.routes = {}
+    httpd.hits = []
+    httpd.url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
@@ -0,0 +1,129 @@
+import os
+import time
+import threading
+
+import pytest
+import requests
+
+from http_client import HttpClient, HostRateLimiter
+
+
+def hit_times(server, path):
+    return [t for p, t in server.hits if p == path]
+
+
+def test_retries_until_success(server):
+    server.routes["/flaky"] = [(503, {}, b""), (502, {}, b""), (200, {}, b"ok")]
+    client = HttpClient(rate=0, max_retries=3, backoff=0.01)
+
+    res = client.get(server.url + "/flaky")
+
+    assert res.text == "ok"
+    assert len(hit_times(server, "/flaky")) == 3
+
+def test_backoff_grows_exponentially(server):
+    server.routes["/flaky"] = [(500, {}, b""), (500, {}, b""), (200, {}, b"ok")]
+    client = HttpClient(rate=0, max_retries=2, backoff=0.1)
+
+    client.get(server.url + "/flaky")
+
+    first, second, third = hit_times(server, "/flaky")
+    assert second - first >= 0.1  # backoff × 2^0 (+ jitter)
+    assert third - second >= 0.2  # backoff × 2^1 (+ jitter)
+
+def test_gives_up_after_max_retries(server):
+    server.routes["/down"] = [(500, {}, b"")]
+    client = HttpClient(rate=0, max_retries=2, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(server.url + "/down")
+    assert len(hit_times(server, "/down")) == 3
+
+def test_client_error_is_not_retried(server):
+    server.routes["/missing"] = [(404, {}, b"")]
+    client = HttpClient(rate=0, max_retries=3, backoff=0.01)
+
+    with pytest.raises(requests.HTTPError):
+        client.get(server.url + "/missing")
+    assert len(hit_times(server, "/missing")) == 1
+
+def test_retry_after_overrides_backoff(server):
+    server.routes["/limited"] = [(429, {"Retry-After": "0.3"}, b""), (200, {}, b"ok")]
+    client = HttpClient(rate=0, max_retries=1, backoff=0)
+
+    assert client.get(server.url + "/limited").text == "ok"
+    first, second = hit_times(server, "/limited")
+    assert second - first >= 0.3
+
+def test_connection_error_is_retried_then_raised():
+    client = HttpClient(rate=0, max_retries=1, backoff=0.01, timeout=1)
+    with pytest.raises(requests.ConnectionError):
+        client.get("http://127.0.0.1:9/")  # discard 포트: 연결 거부
+
+
+def test_rate_limit_spaces_requests_to_same_host(server):
+    server.routes["/page"] = [(200, {}, b"ok")]
+    client = HttpClient(rate=10)  # 호스트당 0.1초에 1번
+
+    for _ in range(3):
+        client.get(server.url + "/page")
+
+    times = hit_times(server, "/page")
+    assert all(b - a >= 0.09 for a, b in zip(times, times[1:]))
+
+def test_rate_limit_is_per_host():
+    limiter = HostRateLimiter(rate=1.0, per_host={"fast.example": 0})
+    start = time.monotonic()
+    limiter.wait("http://slow.example/a")
+    limiter.wait("http://other.example/a")
+    limiter.wait("http://fast.example/a")
+    limiter.wait("http://fast.example/b")
+    assert time.monotonic() - start < 0.5
+
+    limiter.wait("http://slow.example/b")
+    assert time.monotonic() - start >= 0.9
+
+def test_rate_limit_shared_across_threads():
+    limiter = HostRateLimiter(rate=20)  # 0.05초 간격
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.wait, args=("http://host.example/",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.19  # 첫 요청 이후 4번 × 0.05초
+
+
+def test_download_writes_part_file_then_renames(server, tmp_path):
+    body = os.urandom(200_000)
+    server.routes["/paper.pdf"] = [(200, {"Content-Type": "application/pdf"}, body)]
+    client = HttpClient(rate=0)
+    path = str(tmp_path / "paper.pdf")
+
+    size = client.download(server.url + "/paper.pdf", path, chunk_size=4096)
+
+    assert size == len(body)
+    with open(path, "rb") as f:
+        assert f.read() == body
+    assert not os.path.exists(path + ".part")
+
+def test_failed_download_leaves_no_file(server, tmp_path):
+    server.routes["/gone.pdf"] = [(404, {}, b"")]
+    client = HttpClient(rate=0, max_retries=0)
+    path = str(tmp_path / "gone.pdf")
+
+    with pytest.raises(requests.HTTPError):
+        client.download(server.url + "/gone.pdf", path)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".part")
+
+def test_truncated_download_keeps_target_untouched(server, tmp_path):
+    # Content-Length보다 짧게 보내고 연결 종료 → 중간에 끊긴 다운로드
+    server.routes["/cut.pdf"] = [(200, {"Content-Length": "100000"}, b"x" * 1000)]
+    client = HttpClient(rate=0, max_retries=0)
+    path = str(tmp_path / "cut.pdf")
+
+    with pytest.raises(requests.RequestException):
+        client.download(server.url + "/cut.pdf", path)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".part")
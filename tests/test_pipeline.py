@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+import pipeline
+import sources
+from http_client import HttpClient
+from sources import EricSource, Paper
+from work_queue import WorkQueue
+
+
+# 크롤링(items)이 끝나기 전에 첫 다운로드 결과가 나와야 함: 두 번째 항목은 첫 결과를 받은 뒤에야 생성됨
+def test_download_pdfs_yields_before_crawl_finishes(monkeypatch):
+    def download(paper, url, metrics=None):
+        time.sleep(0.05)  # 제출 직후에는 아직 끝나지 않은 다운로드
+        return paper, f"{paper}.pdf"
+    monkeypatch.setattr(pipeline, "download_pdf", download)
+    first_result = threading.Event()
+
+    def crawl():
+        yield "p1", "http://example/p1.pdf"
+        assert first_result.wait(5), "첫 다운로드 결과가 크롤링 도중에 나오지 않음"
+        yield "p2", "http://example/p2.pdf"
+
+    results = []
+    for paper, path in pipeline.download_pdfs(crawl(), workers=2):
+        results.append(paper)
+        first_result.set()
+    assert sorted(results) == ["p1", "p2"]
+
+def test_download_pdfs_bounds_pending_downloads(monkeypatch):
+    def slow_download(paper, url, metrics=None):
+        time.sleep(0.02)
+        return paper, None
+    monkeypatch.setattr(pipeline, "download_pdf", slow_download)
+
+    results, pending = [], []
+    def crawl():
+        for i in range(12):
+            pending.append(i - len(results))  # 제출했지만 아직 내보내지 않은 다운로드 수
+            yield f"p{i}", "http://example/p.pdf"
+
+    for result in pipeline.download_pdfs(crawl(), workers=2, window=4):
+        results.append(result)
+    assert len(results) == 12
+    assert max(pending) <= 4
+
+
+# 로컬 stub 서버로 ERIC 목록 수집(페이지 이동) → PDF 다운로드까지
+def eric_doc(eric_id, year=2024, fulltext=1, url=None):
+    return {"id": eric_id, "title": f"Study  skills {eric_id}", "description": f"Abstract of {eric_id}",
+            "publicationdateyear": year, "e_fulltextauth": fulltext, "url": url}
+
+def eric_page(*docs):
+    return 200, {"Content-Type": "application/json"}, json.dumps({"response": {"docs": list(docs)}}).encode()
+
+def test_eric_crawl_paginates_and_downloads_pdfs(server, tmp_path, monkeypatch):
+    server.routes["/eric/"] = [
+        eric_page(eric_doc("EJ1", url="https://doi.org/10.1000/ABC"), eric_doc("EJ2", fulltext=0)),
+        eric_page(eric_doc("ED3"), eric_doc("ED4", year=2020)),
+        eric_page(),
+    ]
+    pdfs = {eric_id: os.urandom(50_000) for eric_id in ("EJ1", "ED3")}
+    for eric_id, body in pdfs.items():
+        server.routes[f"/fulltext/{eric_id}.pdf"] = [(200, {"Content-Type": "application/pdf"}, body)]
+    server.routes["/fulltext/ED5.pdf"] = [(200, {"Content-Length": "100000"}, b"%PDF" * 100)]  # 중간에 끊김
+    monkeypatch.setattr(sources, "ERIC_API_URL", server.url + "/eric/")
+    monkeypatch.setattr(sources, "ERIC_PDF_URL", server.url + "/fulltext/{eric_id}.pdf")
+    monkeypatch.setattr(pipeline, "PDF_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "http", HttpClient(rate=0, max_retries=0))
+
+    papers = list(EricSource(HttpClient(rate=0), query="study skills", since_year=2023, max_results=50).iter_papers())
+
+    assert [p.key for p in papers] == ["EJ1", "EJ2", "ED3"]  # 2020년 논문은 제외
+    assert papers[0].title == "Study skills EJ1" and papers[0].doi == "10.1000/abc"
+    assert papers[1].pdf_url is None and papers[1].url == "https://eric.ed.gov/?id=EJ2"
+    # 빈 페이지에서 멈춤: start는 받은 문서 수만큼 이동
+    starts = [parse_qs(urlsplit(path).query)["start"] for path, _ in server.hits]
+    assert starts == [["0"], ["2"], ["4"]]
+
+    items = [(p.key, p.pdf_url) for p in papers if p.pdf_url] + [("ED5", server.url + "/fulltext/ED5.pdf")]
+    results = dict(pipeline.download_pdfs(items, workers=2))
+
+    assert results["ED5"] is None
+    for eric_id, body in pdfs.items():
+        with open(results[eric_id], "rb") as f:
+            assert f.read() == body
+    assert sorted(os.listdir(tmp_path)) == ["ED3.pdf", "EJ1.pdf"]  # .part 파일 없음
+
+
+# 초록만 쓰는 논문도 PDF 본문과 같은 요약기를 거쳐서 저장, 먼저 요약된 초록과 거의 같은 초록은 요약하지 않음
+def test_abstract_only_papers_are_summarized(tmp_path, monkeypatch):
+    summarized = []
+    def fake_summarize(text, metrics=None):
+        summarized.append(text)
+        return f"요약: {text.splitlines()[0]}"
+    monkeypatch.setattr(pipeline, "summarize_text", fake_summarize)
+    monkeypatch.setattr(pipeline, "SUMMARY_DIR", str(tmp_path))
+    monkeypatch.setattr(pipeline, "INGEST_MODE", "auto")
+    abstract = " ".join(f"word{i}" for i in range(200))
+    papers = [
+        Paper("eric", "EJ1", "Metacognition", abstract=abstract),
+        Paper("eric", "EJ2", "Metacognition again", abstract=abstract + " too"),
+        Paper("eric", "EJ3", "Needs the PDF", abstract="short", pdf_url="http://example/EJ3.pdf"),
+    ]
+
+    with WorkQueue(str(tmp_path / "queue.sqlite")) as queue:
+        downloads = list(pipeline.papers_to_download(papers, queue))
+        pipeline.summarize_extracted(queue, None, abstracts_only=True)
+
+        assert downloads == [("EJ3", "http://example/EJ3.pdf")]
+        assert [text.splitlines()[0] for text in summarized] == ["Metacognition"]
+        assert queue.get("EJ1")["state"] == "summarized" and queue.get("EJ1")["text"] is None
+        assert queue.get("EJ2")["state"] == "duplicate" and queue.get("EJ2")["duplicate_of"] == "EJ1"
+        with open(queue.get("EJ1")["md_path"], encoding="utf-8") as f:
+            assert f.read() == "# EJ1\n\n요약: Metacognition\n"
@@ -0,0 +1,50 @@
+import time
+
+from langchain_core.documents import Document
+
+from reranker import CrossEncoderReranker
+
+
+# cross-encoder 대신 쌍마다 일정 시간이 걸리는 모델, 점수는 조각 본문 길이
+class SlowModel:
+    def __init__(self, pair_s):
+        self.pair_s = pair_s
+        self.calls = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        time.sleep(self.pair_s * len(pairs))
+        return [len(text) for _, text in pairs]
+
+
+def make_reranker(pair_s, budget_ms, candidates=20):
+    reranker = CrossEncoderReranker("stub", top_n=2, candidates=candidates, budget_ms=budget_ms)
+    reranker._model = SlowModel(pair_s)
+    return reranker
+
+def docs(n):
+    return [Document(page_content="x" * (i + 1)) for i in range(n)]
+
+
+def test_warm_up_seeds_pair_cost():
+    reranker = make_reranker(pair_s=0.005, budget_ms=1000, candidates=10)
+    reranker.warm_up()
+
+    assert reranker._model.calls == [1, 10]  # 초기화용 1쌍 + 후보 수만큼
+    assert 4 <= reranker.pair_ms < 50
+
+def test_first_request_after_warm_up_respects_budget():
+    reranker = make_reranker(pair_s=0.01, budget_ms=50)
+    reranker.warm_up()
+
+    ranked = reranker.rerank("질문", docs(20))
+
+    assert reranker._model.calls[-1] < 20  # 예산(50ms) / 쌍당 ~10ms → 앞쪽 후보만 채점
+    assert len(ranked) == 2
+    assert ranked[0][1] >= ranked[1][1]
+
+def test_without_warm_up_first_request_scores_everything():
+    reranker = make_reranker(pair_s=0.001, budget_ms=1)
+    reranker.rerank("질문", docs(5))
+    assert reranker._model.calls == [5]
+    assert reranker.pair_ms is not None
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import rag
+import server
+import vector_index
+from server import LearnmateService, StubLLM, create_app
+from conftest import HashEmbedding, split
+
+DOCS = {
+    "time-management.md": "시험 기간 시간 관리 계획표 만들기와 우선순위 정하기",
+    "motivation.md": "공부 동기 부여와 목표 설정, 작은 성공 경험 쌓기",
+    "sleep.md": "수면 습관과 집중력, 밤샘 공부의 효과",
+}
+
+
+# 동시에 처리 중인 LLM 호출 수의 최댓값을 기록하는 stub
+class CountingLLM(StubLLM):
+    def __init__(self, delay):
+        super().__init__(delay)
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke(self, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().ainvoke(messages)
+        finally:
+            self.active -= 1
+
+
+def build_index(vector_dir, docs=DOCS):
+    db = vector_index.update_index(str(vector_dir), HashEmbedding(), docs, split, model_name="hash",
+                                   prune=True, index_type="flat")
+    db.close()
+
+
+@pytest.fixture
+def vector_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag, "LATENCY_LOG", str(tmp_path / "latency.jsonl"))
+    build_index(tmp_path / "vectordb")
+    return tmp_path / "vectordb"
+
+@pytest.fixture
+def client(vector_dir):
+    pytest.importorskip("langchain.prompts")  # 답변 프롬프트 (rag.get_prompt)
+    from fastapi.testclient import TestClient
+    app = create_app(embedding=HashEmbedding(), llm=StubLLM(delay=0), vector_dir=str(vector_dir))
+    with TestClient(app) as client:
+        yield client
+
+
+def test_ask_returns_stub_answer_with_sources(client):
+    res = client.post("/ask", json={"question": "시험 기간 시간 관리 계획표 만들기와 우선순위 정하기", "k": 1})
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["answer"].startswith("(stub)")
+    assert body["sources"] == ["time-management"]
+    assert body["cache_hit"] is False
+    assert body["timings"]["total_s"] is not None
+
+def test_repeated_question_hits_answer_cache(client):
+    question = {"question": "공부 동기 부여", "k": 2}
+    assert client.post("/ask", json=question).json()["cache_hit"] is False
+    assert client.post("/ask", json=question).json()["cache_hit"] is True
+
+    metrics = client.get("/metrics").json()
+    assert metrics["requests"] == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["answer_cache"]["hits"] == 1
+
+@pytest.mark.parametrize("k", [0, -1, server.SERVE_MAX_K + 1])
+def test_k_out_of_range_is_rejected(client, k):
+    assert client.post("/ask", json={"question": "q", "k": k}).status_code == 422
+
+def test_index_rebuild_is_picked_up_and_invalidates_cache(client, vector_dir):
+    question = {"question": "수면 습관", "k": 3}
+    before = client.get("/health").json()["index_version"]
+    client.post("/ask", json=question)
+
+    build_index(vector_dir, {**DOCS, "notes.md": "오답 노트 정리 방법"})
+
+    body = client.post("/ask", json=question).json()
+    assert body["cache_hit"] is False
+    assert client.get("/health").json()["index_version"] != before
+
+
+def run_burst(service, questions):
+    async def burst():
+        service.batcher.start()
+        try:
+            return await asyncio.gather(*(service.ask(q, 2) for q in questions), return_exceptions=True)
+        finally:
+            await service.batcher.stop()
+    return asyncio.run(burst())
+
+def test_burst_batches_embeddings_and_bounds_llm_concurrency(vector_dir):
+    pytest.importorskip("langchain.prompts")
+    embedding = HashEmbedding()
+    llm = CountingLLM(delay=0.05)
+
+    async def make_service():
+        return LearnmateService(embedding, llm, str(vector_dir), max_concurrent_llm=3, max_queue=64)
+    service = asyncio.run(make_service())
+    results = run_burst(service, [f"질문 {i}" for i in range(12)])
+
+    assert all(isinstance(r, dict) for r in results), results
+    assert len(embedding.batches) < 12  # 동시에 들어온 질의는 한 번의 embed_documents로
+    assert sum(embedding.batches) == 12
+    assert llm.peak <= 3
+    assert service.pending == 0
+
+def test_requests_over_queue_limit_get_503(vector_dir):
+    pytest.importorskip("langchain.prompts")
+
+    async def make_service():
+        return LearnmateService(HashEmbedding(), StubLLM(delay=0.05), str(vector_dir), max_queue=4)
+    service = asyncio.run(make_service())
+    results = run_burst(service, [f"질문 {i}" for i in range(10)])
+
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 6 and all(r.status_code == 503 for r in rejected)
+    assert service.rejected == 6
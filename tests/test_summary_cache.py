@@ -0,0 +1,134 @@
+import pytest
+
+import summary_cache
+from summary_cache import SummaryCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # accessed 순서가 호출 순서와 같도록 1초씩 증가하는 시계
+    now = [1000.0]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+    monkeypatch.setattr(summary_cache.time, "time", tick)
+    return now
+
+
+def test_cache_key_covers_every_request_field():
+    request = {"model": "gpt-4.1", "messages": [{"role": "user", "content": "chunk"}],
+               "max_tokens": 1000, "temperature": 0.3}
+    key = cache_key(**request)
+
+    assert cache_key(**dict(reversed(list(request.items())))) == key
+    assert cache_key(**{**request, "model": "gpt-4.1-mini"}) != key
+    assert cache_key(**{**request, "temperature": 0.0}) != key
+    assert cache_key(**{**request, "messages": [{"role": "user", "content": "chunk!"}]}) != key
+
+def test_get_put_and_counters(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("k") is None
+    cache.put("k", "요약")
+    assert cache.get("k") == "요약"
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / "nested" / "cache.sqlite")
+    cache = SummaryCache(path)
+    cache.put("k", "요약")
+    cache.close()
+
+    cache = SummaryCache(path)
+    assert cache.get("k") == "요약"
+    cache.close()
+
+def test_evicts_least_recently_used_over_size_limit(tmp_path, clock):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite"), max_mb=250 / (1024 * 1024))  # 250바이트
+    cache.put("a", "x" * 100)
+    cache.put("b", "y" * 100)
+    cache.get("a")  # b가 가장 오래 안 쓴 항목
+    cache.put("c", "z" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 100
+    assert cache.get("c") == "z" * 100
+    assert cache.total_bytes() == 200
+    cache.close()
+
+def test_size_counts_utf8_bytes(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite"))
+    cache.put("k", "한글")
+    assert cache.total_bytes() == 6
+    cache.close()
+
+
+# OpenAI 호환 stub client: chat.completions.create 호출 횟수와 요청을 기록
+class StubCompletions:
+    def __init__(self):
+        self.requests = []
+
+    def create(self, **request):
+        self.requests.append(request)
+        content = request["messages"][-1]["content"]
+        message = type("Message", (), {"content": f"요약({len(content)})"})
+        usage = type("Usage", (), {"prompt_tokens": 10, "completion_tokens": 5})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})], "usage": usage})
+
+class StubClient:
+    def __init__(self):
+        self.completions = StubCompletions()
+        self.chat = type("Chat", (), {"completions": self.completions})
+
+
+def make_summarizer(client, cache, map_prompt="요약: {text}"):
+    pytest.importorskip("tiktoken")
+    from summarizer import Summarizer
+    return Summarizer(client, map_prompt, "합치기: {text}", "system", cache=cache, tokens_per_minute=0)
+
+def test_rerun_makes_no_repeat_api_calls(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    chunks = ["첫 번째 조각", "두 번째 조각", "세 번째 조각"]
+
+    first = StubClient()
+    cache = SummaryCache(path)
+    summary = make_summarizer(first, cache).summarize(chunks)
+    cache.close()
+    assert len(first.completions.requests) == 4  # map 3 + reduce 1
+
+    # 크래시 후 재실행: 같은 캐시 파일이면 API 호출 없이 같은 결과
+    second = StubClient()
+    cache = SummaryCache(path)
+    assert make_summarizer(second, cache).summarize(chunks) == summary
+    assert second.completions.requests == []
+    cache.close()
+
+def test_prompt_change_misses_cache(tmp_path):
+    cache = SummaryCache(str(tmp_path / "cache.sqlite"))
+    make_summarizer(StubClient(), cache).summarize(["조각"])
+
+    client = StubClient()
+    make_summarizer(client, cache, map_prompt="다른 프롬프트: {text}").summarize(["조각"])
+    assert len(client.completions.requests) == 1
+    cache.close()
+
+
+# 입력을 그대로 돌려주는 client: 요약해도 줄지 않으므로 reduce가 max_depth 안에 context에 맞출 수 없음
+class EchoCompletions(StubCompletions):
+    def create(self, **request):
+        response = super().create(**request)
+        response.choices[0].message.content = request["messages"][-1]["content"].split(": ", 1)[1]
+        return response
+
+def test_final_reduce_never_exceeds_context(tmp_path):
+    client = StubClient()
+    client.completions = client.chat.completions = EchoCompletions()
+    summarizer = make_summarizer(client, None)
+    summarizer.context_tokens = 120
+    chunks = [" ".join(f"단어{i}_{j}" for j in range(50)) for i in range(8)]
+
+    summarizer.reduce(summarizer.map(summarizer.map_prompt, chunks), max_depth=2)
+
+    final = client.completions.requests[-1]["messages"][-1]["content"]
+    assert summarizer.counter.count(final.split(": ", 1)[1]) <= summarizer.context_tokens
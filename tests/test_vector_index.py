@@ -0,0 +1,138 @@
+import sqlite3
+import threading
+
+import pytest
+
+import vector_index
+from conftest import HashEmbedding, split
+
+DOCS = {
+    "a.md": "시간 관리 계획표와 우선순위",
+    "b.md": "공부 동기 부여와 목표 설정",
+    "c.md": "수면 습관과 집중력 관리",
+    "d.md": "오답 노트 정리 방법",
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = vector_index.update_index(str(tmp_path), HashEmbedding(), DOCS, split, model_name="hash",
+                                   index_type="flat", dedup=False)
+    yield db
+    db.close()
+
+
+# 검색 방식과 상관없이 점수는 RRF 점수(클수록 관련), 원래 거리 / BM25 점수는 metadata에
+@pytest.mark.parametrize("mode", ["dense", "hybrid"])
+def test_search_score_is_rank_based_in_every_mode(db, mode):
+    db.mode = mode
+    hits = db.search("수면 습관", 3)
+
+    scores = [score for _, score in hits]
+    assert scores == sorted(scores, reverse=True)
+    assert all(0 < score <= 2 / (vector_index.RRF_K + 1) for score in scores)
+    assert all("dense_distance" in doc.metadata for doc, _ in hits)
+
+def test_hybrid_keeps_bm25_score_in_metadata(db):
+    db.mode = "hybrid"
+    doc, _ = db.search("오답 노트", 1)[0]
+    assert doc.metadata["source"] == "d.md"
+    assert doc.metadata["bm25_score"] > 0
+
+def test_search_by_vector_returns_distances(db):
+    hits = db.search_by_vector(HashEmbedding().embed_query(DOCS["b.md"]), 2)
+    assert hits[0][0].metadata["source"] == "b.md"
+    assert hits[0][1] == 0.0 == hits[0][0].metadata["dense_distance"]
+    assert hits[1][1] > hits[0][1]
+
+
+def index_kind(db):
+    return type(vector_index.faiss.downcast_index(vector_index.faiss.downcast_index(db.index).index)).__name__
+
+# 문서가 하나도 바뀌지 않아도 index_type을 바꾸면 저장된 조각으로 다시 만듦
+def test_index_type_change_rebuilds_unchanged_corpus(db, tmp_path):
+    assert db.get_meta("index_type") == "flat"
+    db.close()
+
+    embedding = HashEmbedding()
+    db = vector_index.update_index(str(tmp_path), embedding, DOCS, split, model_name="hash", index_type="hnsw")
+    assert db.get_meta("index_type") == "hnsw"
+    assert index_kind(db).startswith("IndexHNSW")
+    assert db.count == len(DOCS)
+    assert sum(embedding.batches) == len(DOCS)
+    db.close()
+
+    # 종류를 지정하지 않으면 저장된 종류 유지, 다시 임베딩하지 않음
+    embedding = HashEmbedding()
+    db = vector_index.update_index(str(tmp_path), embedding, DOCS, split, model_name="hash", index_type=None)
+    assert db.get_meta("index_type") == "hnsw"
+    assert embedding.batches == []
+    db.close()
+
+def test_pq_on_small_corpus_stays_flat_without_rebuild(db, tmp_path):
+    db.close()
+    embedding = HashEmbedding()
+    db = vector_index.update_index(str(tmp_path), embedding, DOCS, split, model_name="hash", index_type="pq")
+    assert db.get_meta("index_type") == "flat"
+    assert embedding.batches == []
+    db.close()
+
+
+# 인덱스 교체: 동시에 들어온 요청은 한 번만 로드, 이전 인덱스는 사용 중인 요청이 끝난 뒤에 닫힘
+class FakeIndex:
+    def __init__(self, version):
+        self.version = version
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_shared_index_reloads_once_and_closes_old_index_after_readers(monkeypatch):
+    version = ["v1"]
+    loads = []
+
+    def fake_load(vector_dir, embedding):
+        loads.append(version[0])
+        return FakeIndex(version[0])
+    monkeypatch.setattr(vector_index, "index_version", lambda vector_dir: version[0])
+    monkeypatch.setattr(vector_index, "load_index", fake_load)
+    shared = vector_index.SharedIndex("unused", HashEmbedding())
+
+    held = []
+    threads = [threading.Thread(target=lambda: held.append(shared.acquire()[0])) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loads == ["v1"] and all(db is held[0] for db in held)
+
+    version[0] = "v2"
+    new, new_version = shared.acquire()
+    assert new_version == "v2" and not held[0].closed
+
+    for db in held[:-1]:
+        shared.release(db)
+    assert not held[0].closed
+    shared.release(held[-1])
+    assert held[0].closed
+    shared.release(new)
+    assert not new.closed
+
+    shared.close()
+    assert new.closed
+
+def test_shared_index_closes_replaced_index_on_rebuild(tmp_path):
+    vector_index.update_index(str(tmp_path), HashEmbedding(), DOCS, split, model_name="hash").close()
+    shared = vector_index.SharedIndex(str(tmp_path), HashEmbedding())
+    old_version = shared.load()
+    old = shared.db
+
+    vector_index.update_index(str(tmp_path), HashEmbedding(), {**DOCS, "e.md": "복습 주기"}, split,
+                              model_name="hash").close()
+    db, version = shared.acquire()
+    shared.release(db)
+
+    assert version != old_version and db.count == len(DOCS) + 1
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.conn.execute("SELECT 1")
+    shared.close()